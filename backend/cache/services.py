@@ -1,6 +1,8 @@
-import json
 import logging
-from typing import Optional
+import time
+from typing import Dict, List, Optional, Tuple
+
+from celery import current_app
 from django.core.cache import cache
 
 logger = logging.getLogger(__name__)
@@ -9,8 +11,22 @@ logger = logging.getLogger(__name__)
 class CacheService:
     PRICE_TTL = 30
     PAIRS_TTL = 3600
+    PAIRS_STALE_TTL = 7200
+    PAIRS_REFRESH_LOCK_TTL = 30
+    LOCAL_PAIRS_TTL = 5
+    PRICE_REFETCH_LOCK_TTL = 60
+
+    PAIRS_KEY = "forex:pairs:active"
+    PAIRS_STALE_KEY = "forex:pairs:active:stale"
+    PAIRS_REFRESH_LOCK_KEY = "forex:pairs:active:refresh"
+    PRICE_REFETCH_LOCK_KEY = "forex:prices:refetch"
+
+    # Process-local copy of the active pairs list: (monotonic fetch time, pairs)
+    _pairs_local: Optional[Tuple[float, list]] = None
 
     def __init__(self):
+        # Values are passed to the cache as plain dicts/lists; django-redis
+        # owns (de)serialization via the SERIALIZER set in settings.CACHES.
         self.cache = cache
 
     # ---------- Price ----------
@@ -21,21 +37,7 @@ class CacheService:
         """
         key = f"forex:price:{pair_symbol}"
         try:
-            value = self.cache.get(key)
-            if value is None:
-                return None
-            
-            # Handle both string and already-deserialized values
-            if isinstance(value, str):
-                return json.loads(value)
-            elif isinstance(value, dict):
-                return value
-            else:
-                logger.warning(f"Unexpected cache value type for {key}: {type(value)}")
-                return None
-        except json.JSONDecodeError as e:
-            logger.warning(f"Failed to decode JSON for price {pair_symbol}: {e}", exc_info=True)
-            return None
+            return self.cache.get(key)
         except Exception as e:
             logger.warning(f"Redis GET price failed for {pair_symbol}", exc_info=True)
             return None
@@ -46,51 +48,127 @@ class CacheService:
         """
         key = f"forex:price:{pair_symbol}"
         try:
-            # Serialize to JSON string for consistent storage
-            serialized = json.dumps(data)
-            self.cache.set(key, serialized, timeout=self.PRICE_TTL)
+            self.cache.set(key, data, timeout=self.PRICE_TTL)
         except (TypeError, ValueError) as e:
             logger.warning(f"Failed to serialize price data for {pair_symbol}: {e}", exc_info=True)
         except Exception as e:
             logger.warning(f"Redis SET price failed for {pair_symbol}", exc_info=True)
 
+    def get_prices_bulk(self, pair_symbols: List[str]) -> Dict[str, Optional[dict]]:
+        """
+        Get cached price data for several forex pairs in a single MGET.
+        Symbols that are not cached map to None.
+        """
+        keys = {symbol: f"forex:price:{symbol}" for symbol in pair_symbols}
+        try:
+            found = self.cache.get_many(keys.values())
+        except Exception:
+            logger.warning("Redis MGET prices failed", exc_info=True)
+            return dict.fromkeys(pair_symbols)
+        return {symbol: found.get(key) for symbol, key in keys.items()}
+
+    def set_prices_bulk(self, prices: Dict[str, dict]) -> None:
+        """
+        Cache price data for several forex pairs in one pipelined round-trip.
+        """
+        if not prices:
+            return
+        try:
+            # django-redis issues set_many as a single pipeline
+            self.cache.set_many(
+                {f"forex:price:{symbol}": data for symbol, data in prices.items()},
+                timeout=self.PRICE_TTL,
+            )
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Failed to serialize bulk price data: {e}", exc_info=True)
+        except Exception as e:
+            logger.warning("Redis pipeline SET prices failed", exc_info=True)
+
     # ---------- Pairs ----------
     def get_active_pairs(self) -> Optional[list]:
         """
         Get cached list of active forex pairs.
-        Returns None if not found or on error.
+        Served from a short-lived process-local copy when fresh, then Redis.
+        When only the stale copy is left, it is returned and a background
+        refresh is enqueued (stale-while-revalidate).
+        Returns None if neither copy is found or on error.
         """
-        key = "forex:pairs:active"
+        local = CacheService._pairs_local
+        if local is not None and time.monotonic() - local[0] < self.LOCAL_PAIRS_TTL:
+            return local[1]
+
         try:
-            value = self.cache.get(key)
-            if value is None:
+            pairs = self.cache.get(self.PAIRS_KEY)
+            if pairs is not None:
+                CacheService._pairs_local = (time.monotonic(), pairs)
+                return pairs
+            # The stale copy is only read (and decoded) when the fresh one is gone
+            stale = self.cache.get(self.PAIRS_STALE_KEY)
+            if stale is None:
                 return None
-            
-            # Handle both string and already-deserialized values
-            if isinstance(value, str):
-                return json.loads(value)
-            elif isinstance(value, list):
-                return value
-            else:
-                logger.warning(f"Unexpected cache value type for {key}: {type(value)}")
-                return None
-        except json.JSONDecodeError as e:
-            logger.warning(f"Failed to decode JSON for active pairs: {e}", exc_info=True)
-            return None
+            self._schedule_pairs_refresh()
+            return stale
         except Exception as e:
             logger.warning("Redis GET pairs failed", exc_info=True)
             return None
 
     def set_active_pairs(self, data: list) -> None:
         """
-        Cache list of active forex pairs.
+        Cache list of active forex pairs
+        (dicts with id, symbol, base and quote, as returned by the pairs API).
+        A longer-lived stale copy is kept to serve while the list is refreshed.
         """
-        key = "forex:pairs:active"
         try:
-            # Serialize to JSON string for consistent storage
-            serialized = json.dumps(data)
-            self.cache.set(key, serialized, timeout=self.PAIRS_TTL)
+            self.cache.set(self.PAIRS_KEY, data, timeout=self.PAIRS_TTL)
+            self.cache.set(self.PAIRS_STALE_KEY, data, timeout=self.PAIRS_STALE_TTL)
+            CacheService._pairs_local = (time.monotonic(), data)
         except (TypeError, ValueError) as e:
             logger.warning(f"Failed to serialize active pairs data: {e}", exc_info=True)
         except Exception as e:
             logger.warning("Redis SET pairs failed", exc_info=True)
+
+    def delete_active_pairs(self) -> None:
+        """
+        Drop the cached list of active forex pairs (e.g. after a pair changes).
+        The stale copy goes too, so the next read reloads from the DB.
+        """
+        CacheService._pairs_local = None
+        try:
+            self.cache.delete_many([self.PAIRS_KEY, self.PAIRS_STALE_KEY])
+        except Exception as e:
+            logger.warning("Redis DELETE pairs failed", exc_info=True)
+
+    def _schedule_pairs_refresh(self) -> None:
+        """
+        Enqueue a single refresh of the active pairs list.
+        cache.add acts as a distributed lock so concurrent readers of the
+        stale copy don't all trigger a reload.
+        """
+        try:
+            if self.cache.add(self.PAIRS_REFRESH_LOCK_KEY, 1, timeout=self.PAIRS_REFRESH_LOCK_TTL):
+                # retry=False: never block a request on an unavailable broker
+                current_app.send_task("market.tasks.refresh_active_pairs", retry=False)
+        except Exception as e:
+            logger.warning("Failed to schedule active pairs refresh", exc_info=True)
+
+    # ---------- Price refetch ----------
+    def claim_price_refetch(self) -> bool:
+        """
+        Claim the right to dispatch a per-pair price refetch.
+        cache.add acts as a distributed lock: at most one refetch is in
+        flight per PRICE_REFETCH_LOCK_TTL. False if already claimed or on error.
+        """
+        try:
+            return bool(self.cache.add(self.PRICE_REFETCH_LOCK_KEY, 1, timeout=self.PRICE_REFETCH_LOCK_TTL))
+        except Exception as e:
+            logger.warning("Redis ADD price refetch lock failed", exc_info=True)
+            return False
+
+    def release_price_refetch(self) -> None:
+        """
+        Release the per-pair price refetch lock once the refetch is done.
+        """
+        try:
+            self.cache.delete(self.PRICE_REFETCH_LOCK_KEY)
+        except Exception as e:
+            logger.warning("Redis DELETE price refetch lock failed", exc_info=True)
@@ -96,7 +96,10 @@ def test_cache_service_pairs():
     print("=" * 50)
     
     service = CacheService()
-    test_pairs = ["EURUSD", "GBPUSD", "USDJPY", "AUDUSD"]
+    test_pairs = [
+        {"id": 1, "symbol": "EURUSD", "base": "EUR", "quote": "USD"},
+        {"id": 2, "symbol": "GBPUSD", "base": "GBP", "quote": "USD"},
+    ]
     
     try:
         # Test SET
@@ -0,0 +1,80 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from cache.services import CacheService
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+PAIRS = [{"id": 1, "symbol": "EURUSD", "base": "EUR", "quote": "USD"}]
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+@mock.patch("cache.services.current_app.send_task")
+class ActivePairsCacheTests(SimpleTestCase):
+    """CacheService.get_active_pairs: local copy, fresh key, then stale-while-revalidate"""
+
+    def setUp(self):
+        cache.clear()
+        CacheService._pairs_local = None
+        self.service = CacheService()
+
+    def tearDown(self):
+        CacheService._pairs_local = None
+
+    def test_fresh_copy_is_served_without_refresh(self, send_task):
+        self.service.set_active_pairs(PAIRS)
+        CacheService._pairs_local = None
+
+        self.assertEqual(self.service.get_active_pairs(), PAIRS)
+        send_task.assert_not_called()
+
+    def test_local_copy_skips_the_cache(self, send_task):
+        self.service.set_active_pairs(PAIRS)
+        cache.clear()
+
+        self.assertEqual(self.service.get_active_pairs(), PAIRS)
+
+    def test_stale_copy_is_served_and_one_refresh_is_scheduled(self, send_task):
+        self.service.set_active_pairs(PAIRS)
+        CacheService._pairs_local = None
+        cache.delete(CacheService.PAIRS_KEY)
+
+        self.assertEqual(self.service.get_active_pairs(), PAIRS)
+        self.assertEqual(CacheService().get_active_pairs(), PAIRS)
+
+        send_task.assert_called_once_with("market.tasks.refresh_active_pairs", retry=False)
+
+    def test_stale_copy_is_not_read_while_fresh_key_exists(self, send_task):
+        self.service.set_active_pairs(PAIRS)
+        CacheService._pairs_local = None
+
+        with mock.patch.object(cache, "get", wraps=cache.get) as get:
+            self.service.get_active_pairs()
+
+        get.assert_called_once_with(CacheService.PAIRS_KEY)
+
+    def test_miss_returns_none(self, send_task):
+        self.assertIsNone(self.service.get_active_pairs())
+        send_task.assert_not_called()
+
+    def test_delete_drops_both_copies(self, send_task):
+        self.service.set_active_pairs(PAIRS)
+        self.service.delete_active_pairs()
+
+        self.assertIsNone(self.service.get_active_pairs())
+        send_task.assert_not_called()
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PriceRefetchLockTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_only_one_refetch_can_be_claimed(self):
+        self.assertTrue(CacheService().claim_price_refetch())
+        self.assertFalse(CacheService().claim_price_refetch())
+
+        CacheService().release_price_refetch()
+        self.assertTrue(CacheService().claim_price_refetch())
@@ -9,4 +9,6 @@ app = Celery('core')
 app.config_from_object("django.conf:settings", namespace='CELERY')
 
 # fetches task made for celery
-app.autodiscover_tasks()
\ No newline at end of file
+# Discovery is lazy: tasks modules are only imported when a worker/beat
+# process imports its default modules, never by web processes importing the app.
+app.autodiscover_tasks(related_name="tasks", force=False)
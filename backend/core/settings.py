@@ -53,6 +53,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'market',
     'cache',
@@ -116,14 +117,28 @@ CACHES = {
     "default": {
         "BACKEND": "django_redis.cache.RedisCache",
         "LOCATION": os.getenv("REDIS_URL"),
+        # Bumped with the pickle -> msgpack/zstd switch below: keys written
+        # by the old format are no longer read (and simply expire) instead
+        # of failing to decode during a rolling deploy.
+        "VERSION": 2,
         "OPTIONS": {
             "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            # Store values as msgpack instead of pickle; CacheService passes
+            # plain dicts/lists and never encodes payloads itself.
+            "SERIALIZER": "django_redis.serializers.msgpack.MSGPackSerializer",
+            # The active pairs list and bulk price payloads repeat the same
+            # keys/symbols over and over and compress well with zstd.
+            "COMPRESSOR": "django_redis.compressors.zstd.ZStdCompressor",
         }
     }
 }
 
 CACHE_TTL = 3600  # seconds
 
+# Price history partitions older than this are dropped by
+# market.tasks.maintain_price_history_partitions
+PRICE_HISTORY_RETENTION_DAYS = int(os.getenv("PRICE_HISTORY_RETENTION_DAYS", "90"))
+
 
 # REST Framework configuration
 REST_FRAMEWORK = {
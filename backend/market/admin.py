@@ -19,6 +19,7 @@ class ForexPairAdmin(admin.ModelAdmin):
 @admin.register(ForexCandle)
 class ForexCandleAdmin(admin.ModelAdmin):
     list_display = ['pair', 'timeframe', 'open', 'high', 'low', 'close', 'volume', 'timestamp']
+    list_select_related = ['pair']
     list_filter = ['timeframe', 'timestamp', 'pair']
     search_fields = ['pair__symbol']
     readonly_fields = ['timestamp']
@@ -29,6 +30,7 @@ class ForexCandleAdmin(admin.ModelAdmin):
 @admin.register(ForexPriceSnapshot)
 class ForexPriceSnapshotAdmin(admin.ModelAdmin):
     list_display = ['pair', 'price', 'bid', 'ask', 'timestamp']
+    list_select_related = ['pair']
     list_filter = ['timestamp', 'pair']
     search_fields = ['pair__symbol']
     readonly_fields = ['timestamp']
@@ -39,6 +41,7 @@ class ForexPriceSnapshotAdmin(admin.ModelAdmin):
 @admin.register(ForexPriceHistory)
 class ForexPriceHistoryAdmin(admin.ModelAdmin):
     list_display = ['pair', 'price', 'bid', 'ask', 'timestamp']
+    list_select_related = ['pair']
     list_filter = ['timestamp', 'pair']
     search_fields = ['pair__symbol']
     readonly_fields = ['timestamp']
@@ -2,7 +2,6 @@
 Serializers for candle endpoints.
 """
 from rest_framework import serializers
-from decimal import Decimal
 from market.models import ForexCandle
 
 
@@ -10,6 +9,8 @@ class CandleSerializer(serializers.ModelSerializer):
     """
     Serializer for individual candle data.
     Converts Decimal fields to float and ensures ISO timestamp.
+    FloatField already calls float() on the model's Decimal values,
+    so no per-field post-processing is needed.
     """
     timestamp = serializers.DateTimeField(format='iso-8601')
     open = serializers.FloatField()
@@ -23,17 +24,6 @@ class CandleSerializer(serializers.ModelSerializer):
         fields = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
         read_only_fields = fields
 
-    def to_representation(self, instance):
-        """
-        Override to convert Decimal to float.
-        """
-        data = super().to_representation(instance)
-        # Convert Decimal fields to float
-        for field in ['open', 'high', 'low', 'close', 'volume']:
-            if field in data and isinstance(data[field], (str, Decimal)):
-                data[field] = float(Decimal(str(data[field])))
-        return data
-
 
 class CandleListResponseSerializer(serializers.Serializer):
     """
@@ -3,7 +3,6 @@ Serializers for price endpoints.
 Handles Decimal → float conversion safely.
 """
 from rest_framework import serializers
-from decimal import Decimal
 from typing import Dict, Any
 
 
@@ -22,14 +21,20 @@ class LatestPriceSerializer(serializers.Serializer):
     def from_snapshot_data(data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Converts service layer data (with Decimal strings) to API format.
-        Safely converts Decimal strings to floats.
+        float() parses the decimal strings directly; no Decimal is needed
+        since the output fields are floats.
+        The result is response-ready, so views return it without a
+        validation round-trip.
         """
+        timestamp = data['timestamp']  # Already ISO format from service
+        if timestamp.endswith('+00:00'):
+            timestamp = timestamp[:-6] + 'Z'  # Match DateTimeField's UTC output
         return {
             'pair': data['symbol'],
-            'price': float(Decimal(data['price'])),
-            'bid': float(Decimal(data['bid'])),
-            'ask': float(Decimal(data['ask'])),
-            'timestamp': data['timestamp'],  # Already ISO format from service
+            'price': float(data['price']),
+            'bid': float(data['bid']),
+            'ask': float(data['ask']),
+            'timestamp': timestamp,
         }
 
 
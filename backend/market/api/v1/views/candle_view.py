@@ -7,15 +7,47 @@ from rest_framework import status
 from django.utils import timezone
 from datetime import datetime
 
+try:
+    from ciso8601 import parse_datetime as _parse_datetime
+except ImportError:  # C parser not installed, fall back to the stdlib
+    _parse_datetime = None
+
 from market.models import ForexCandle
 from market.services.pair_services import PairService
-from market.api.v1.serializers import CandleListResponseSerializer
 from market.api.v1.exceptions import (
     PairNotFoundError,
     InvalidTimeframeError,
     InvalidParameterError,
 )
 
+# Supported timeframes never change within a process
+_TIMEFRAMES = tuple(choice[0] for choice in ForexCandle.TIMEFRAME_CHOICES)
+_VALID_TIMEFRAMES = frozenset(_TIMEFRAMES)
+
+
+def _parse_iso(value: str) -> datetime:
+    """
+    Parse an ISO 8601 timestamp (trailing 'Z' allowed) into an aware datetime.
+    Naive values are taken to be in the current timezone.
+    """
+    if _parse_datetime is not None:
+        parsed = _parse_datetime(value)
+    else:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _format_timestamp(value: datetime) -> str:
+    """
+    ISO 8601 with a 'Z' suffix for UTC, matching DRF's DateTimeField output.
+    """
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
 
 class CandleListView(APIView):
     """
@@ -48,10 +80,9 @@ class CandleListView(APIView):
             raise PairNotFoundError(str(e))
         
         # Validate timeframe
-        valid_timeframes = [choice[0] for choice in ForexCandle.TIMEFRAME_CHOICES]
-        if timeframe not in valid_timeframes:
+        if timeframe not in _VALID_TIMEFRAMES:
             raise InvalidTimeframeError(
-                f"Invalid timeframe '{timeframe}'. Valid options: {', '.join(valid_timeframes)}"
+                f"Invalid timeframe '{timeframe}'. Valid options: {', '.join(_TIMEFRAMES)}"
             )
         
         # Parse optional parameters
@@ -61,11 +92,7 @@ class CandleListView(APIView):
         from_timestamp = None
         if 'from' in request.query_params:
             try:
-                from_timestamp = datetime.fromisoformat(
-                    request.query_params['from'].replace('Z', '+00:00')
-                )
-                if timezone.is_naive(from_timestamp):
-                    from_timestamp = timezone.make_aware(from_timestamp)
+                from_timestamp = _parse_iso(request.query_params['from'])
             except ValueError:
                 raise InvalidParameterError("Invalid 'from' timestamp format. Use ISO 8601.")
         
@@ -78,19 +105,29 @@ class CandleListView(APIView):
         if from_timestamp:
             queryset = queryset.filter(timestamp__lte=from_timestamp)
         
-        candles = queryset[:limit]
+        # Plain row dicts: no model instances are built
+        candles = list(
+            queryset.values('timestamp', 'open', 'high', 'low', 'close', 'volume')[:limit]
+        )
         
-        # Reverse to chronological order (oldest first)
-        candles = list(reversed(candles))
+        # Build the payload directly from row dicts, reversed to chronological order (oldest first)
+        candle_data = [
+            {
+                'timestamp': _format_timestamp(candle['timestamp']),
+                'open': float(candle['open']),
+                'high': float(candle['high']),
+                'low': float(candle['low']),
+                'close': float(candle['close']),
+                'volume': float(candle['volume']),
+            }
+            for candle in reversed(candles)
+        ]
         
-        # Serialize response
-        serializer = CandleListResponseSerializer({
+        return Response({
             'pair': pair_symbol,
             'timeframe': timeframe,
-            'candles': candles,
-        })
-        
-        return Response(serializer.data, status=status.HTTP_200_OK)
+            'candles': candle_data,
+        }, status=status.HTTP_200_OK)
 
 
 class TimeframeListView(APIView):
@@ -100,10 +137,8 @@ class TimeframeListView(APIView):
     Get list of supported timeframes.
     """
     def get(self, request):
-        timeframes = [choice[0] for choice in ForexCandle.TIMEFRAME_CHOICES]
-        
         return Response(
-            {'timeframes': timeframes},
+            {'timeframes': _TIMEFRAMES},
             status=status.HTTP_200_OK
         )
 
@@ -7,6 +7,7 @@ from rest_framework import status
 from django.db.models import Q
 
 from market.models import ForexPair
+from market.services.pair_services import PairService
 from market.api.v1.serializers import PairListResponseSerializer
 
 
@@ -17,20 +18,28 @@ class PairSearchView(APIView):
     Search forex pairs by keyword.
     Query param: q (optional) - search keyword (EUR, USD, etc.)
     """
+    MAX_RESULTS = 50  # Reasonable limit
+    
     def get(self, request):
         query = request.query_params.get('q', '').strip().upper()
         
-        queryset = ForexPair.objects.filter(is_active=True)
-        
-        if query:
-            # Search by symbol, base_currency, or quote_currency
-            queryset = queryset.filter(
-                Q(symbol__icontains=query) |
-                Q(base_currency__icontains=query) |
-                Q(quote_currency__icontains=query)
+        if not query:
+            # Unfiltered listing is the same for every request: serve the cached active pairs
+            return Response(
+                {'pairs': PairService.get_active_pairs()[:self.MAX_RESULTS]},
+                status=status.HTTP_200_OK
             )
         
-        pairs = queryset.order_by('symbol')[:50]  # Reasonable limit
+        # Search by symbol prefix or exact currency code. The query is already
+        # uppercased, and unlike icontains ('%q%') these lookups can use the
+        # existing symbol/currency indexes.
+        queryset = ForexPair.active_objects.filter(
+            Q(symbol__startswith=query) |
+            Q(base_currency=query) |
+            Q(quote_currency=query)
+        )
+        
+        pairs = queryset.order_by('symbol')[:self.MAX_RESULTS]
         
         serializer = PairListResponseSerializer({
             'pairs': pairs
@@ -1,6 +1,8 @@
 """
 Views for price endpoints.
 """
+from functools import lru_cache
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
@@ -10,13 +12,23 @@ from market.services.pair_services import PairService
 from market.services.price_services import PriceService
 from market.providers.forexrateapi import ForexRateAPIProvider
 from cache.services import CacheService
-from market.api.v1.serializers import (
-    LatestPriceSerializer,
-    BulkPriceResponseSerializer,
-)
+from market.api.v1.serializers import LatestPriceSerializer
 from market.api.v1.exceptions import PairNotFoundError, InvalidParameterError
 
 
+@lru_cache(maxsize=1)
+def _get_price_service() -> PriceService:
+    """
+    Process-wide PriceService, so the provider's HTTP session and the Redis
+    connection pool are reused across requests. Built lazily so a missing
+    API key only fails the price endpoints instead of URL loading.
+    """
+    return PriceService(
+        provider=ForexRateAPIProvider(),
+        cache_service=CacheService()
+    )
+
+
 class LatestPriceView(APIView):
     """
     GET /api/v1/market/prices/latest
@@ -37,20 +49,13 @@ class LatestPriceView(APIView):
             raise PairNotFoundError(str(e))
         
         # Get price from service layer
-        price_service = PriceService(
-            provider=ForexRateAPIProvider(),
-            cache_service=CacheService()
-        )
-        
-        snapshot_data = price_service.get_latest_price(pair_symbol)
+        snapshot_data = _get_price_service().get_latest_price(pair_symbol)
         
-        # Convert to API format
-        serializer = LatestPriceSerializer(
-            data=LatestPriceSerializer.from_snapshot_data(snapshot_data)
+        # Convert to API format (already response-shaped, no re-validation needed)
+        return Response(
+            LatestPriceSerializer.from_snapshot_data(snapshot_data),
+            status=status.HTTP_200_OK
         )
-        serializer.is_valid(raise_exception=True)
-        
-        return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 class BulkPriceView(APIView):
@@ -77,30 +82,44 @@ class BulkPriceView(APIView):
         if len(pairs) > 100:
             raise InvalidParameterError("Maximum 100 pairs allowed per request")
         
-        # Normalize and validate all pairs
-        price_service = PriceService(
-            provider=ForexRateAPIProvider(),
-            cache_service=CacheService()
-        )
+        price_service = _get_price_service()
+        
+        # Normalize pairs (dropping duplicates) and validate them against the cached active set
+        normalized_pairs = list(dict.fromkeys(
+            PairService._normalize_symbol(pair_symbol) for pair_symbol in pairs
+        ))
+        active_pairs = {
+            pair['symbol'] for pair in PairService.get_active_pairs(price_service.cache)
+        }
         
         results = {}
         errors = {}
         
-        for pair_symbol in pairs:
-            normalized = PairService._normalize_symbol(pair_symbol)
-            try:
-                PairService.validate_pair(normalized)
-                snapshot_data = price_service.get_latest_price(normalized)
-                
-                # Convert to API format
-                price_data = LatestPriceSerializer.from_snapshot_data(snapshot_data)
-                results[normalized] = {
-                    'price': price_data['price'],
-                    'timestamp': price_data['timestamp'],
-                }
-            except ValueError:
+        valid_pairs = []
+        for normalized in normalized_pairs:
+            if normalized in active_pairs:
+                valid_pairs.append(normalized)
+            else:
                 errors[normalized] = "Pair not found or inactive"
         
+        # Cache, DB and provider are each hit at most once for the whole batch
+        prices = price_service.get_latest_prices(valid_pairs)
+        
+        for normalized in valid_pairs:
+            snapshot_data = prices.get(normalized)
+            if snapshot_data is None:
+                # Valid pair, but no cached/stored price and the provider
+                # couldn't price it: transient, unlike an unknown symbol
+                errors[normalized] = "Price unavailable"
+                continue
+            
+            # Convert to API format
+            price_data = LatestPriceSerializer.from_snapshot_data(snapshot_data)
+            results[normalized] = {
+                'price': price_data['price'],
+                'timestamp': price_data['timestamp'],
+            }
+        
         # Build response
         response_data = {
             'prices': results
@@ -110,8 +129,5 @@ class BulkPriceView(APIView):
         if errors:
             response_data['errors'] = errors
         
-        serializer = BulkPriceResponseSerializer(data=response_data)
-        serializer.is_valid(raise_exception=True)
-        
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(response_data, status=status.HTTP_200_OK)
 
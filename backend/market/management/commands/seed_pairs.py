@@ -1,46 +1,59 @@
 # backend/market/management/commands/seed_pairs.py
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from market.models import ForexPair
+from cache.services import CacheService
+
+
+# Common forex pairs: (symbol, base, quote)
+PAIRS = (
+    ("EURUSD", "EUR", "USD"),
+    ("GBPUSD", "GBP", "USD"),
+    ("USDJPY", "USD", "JPY"),
+    ("USDCHF", "USD", "CHF"),
+    ("AUDUSD", "AUD", "USD"),
+    ("USDCAD", "USD", "CAD"),
+    ("NZDUSD", "NZD", "USD"),
+    ("EURGBP", "EUR", "GBP"),
+    ("EURJPY", "EUR", "JPY"),
+    ("GBPJPY", "GBP", "JPY"),
+)
 
 
 class Command(BaseCommand):
     help = 'Seed initial forex pairs into the database'
 
     def handle(self, *args, **options):
-        # Common forex pairs
-        pairs = [
-            {"symbol": "EURUSD", "base": "EUR", "quote": "USD"},
-            {"symbol": "GBPUSD", "base": "GBP", "quote": "USD"},
-            {"symbol": "USDJPY", "base": "USD", "quote": "JPY"},
-            {"symbol": "USDCHF", "base": "USD", "quote": "CHF"},
-            {"symbol": "AUDUSD", "base": "AUD", "quote": "USD"},
-            {"symbol": "USDCAD", "base": "USD", "quote": "CAD"},
-            {"symbol": "NZDUSD", "base": "NZD", "quote": "USD"},
-            {"symbol": "EURGBP", "base": "EUR", "quote": "GBP"},
-            {"symbol": "EURJPY", "base": "EUR", "quote": "JPY"},
-            {"symbol": "GBPJPY", "base": "GBP", "quote": "JPY"},
+        # One SELECT for the existing symbols and one INSERT for the rest,
+        # instead of a get_or_create round-trip per pair
+        existing = set(
+            ForexPair.objects.filter(
+                symbol__in=[symbol for symbol, _, _ in PAIRS]
+            ).values_list("symbol", flat=True)
+        )
+        new_pairs = [
+            ForexPair(symbol=symbol, base_currency=base, quote_currency=quote, is_active=True)
+            for symbol, base, quote in PAIRS
+            if symbol not in existing
         ]
 
-        created_count = 0
-        for pair_data in pairs:
-            pair, created = ForexPair.objects.get_or_create(
-                symbol=pair_data["symbol"],
-                defaults={
-                    "base_currency": pair_data["base"],
-                    "quote_currency": pair_data["quote"],
-                    "is_active": True,
-                }
-            )
-            if created:
-                created_count += 1
+        with transaction.atomic():
+            ForexPair.objects.bulk_create(new_pairs, ignore_conflicts=True, batch_size=500)
+
+        # bulk_create skips post_save, so drop the cached pairs list here
+        if new_pairs:
+            CacheService().delete_active_pairs()
+
+        for symbol, _, _ in PAIRS:
+            if symbol in existing:
                 self.stdout.write(
-                    self.style.SUCCESS(f'✓ Created {pair_data["symbol"]}')
+                    f'  {symbol} already exists'
                 )
             else:
                 self.stdout.write(
-                    f'  {pair_data["symbol"]} already exists'
+                    self.style.SUCCESS(f'✓ Created {symbol}')
                 )
 
         self.stdout.write(
-            self.style.SUCCESS(f'\n✓ Created {created_count} new pairs')
+            self.style.SUCCESS(f'\n✓ Created {len(new_pairs)} new pairs')
         )
\ No newline at end of file
@@ -5,9 +5,40 @@ Usage: python manage.py setup_candle_tasks
 
 import json
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django_celery_beat.models import PeriodicTask, IntervalSchedule
 
 
+# (task name, every_seconds, task path, args, description)
+PERIODIC_TASKS = [
+    (
+        "Poll latest prices", 30, "market.tasks.poll_latest_prices", [],
+        "Poll latest prices for all active forex pairs every 30 seconds",
+    ),
+    (
+        "Aggregate 5m candles", 300, "market.tasks.aggregate_candles", ["5m"],
+        "Aggregate candle data from price snapshots at 5 minutes interval",
+    ),
+    (
+        "Aggregate 15m candles", 900, "market.tasks.aggregate_candles", ["15m"],
+        "Aggregate candle data from price snapshots at 15 minutes interval",
+    ),
+    (
+        "Aggregate 1h candles", 3600, "market.tasks.aggregate_candles", ["1h"],
+        "Aggregate candle data from price snapshots at 1 hour interval",
+    ),
+    (
+        "Aggregate 1d candles", 86400, "market.tasks.aggregate_candles", ["1d"],
+        "Aggregate candle data from price snapshots at 1 day interval",
+    ),
+    (
+        "Maintain price history partitions", 86400,
+        "market.tasks.maintain_price_history_partitions", [],
+        "Create upcoming monthly price history partitions and drop expired ones",
+    ),
+]
+
+
 class Command(BaseCommand):
     help = 'Set up periodic tasks for price polling and aggregating candles from price snapshots'
 
@@ -16,115 +47,128 @@ class Command(BaseCommand):
         
         created_count = 0
         updated_count = 0
+        unchanged_count = 0
+        # Output is collected and written once at the end
+        lines = []
         
-        # First, set up the price polling task (runs every 30 seconds)
-        self.stdout.write(self.style.SUCCESS('\n=== Setting up Price Polling Task ==='))
-        price_schedule, price_schedule_created = IntervalSchedule.objects.get_or_create(
-            every=30,
-            period=IntervalSchedule.SECONDS,
-        )
+        lines.append(self.style.SUCCESS('\n=== Setting up Periodic Tasks ==='))
         
-        if price_schedule_created:
-            self.stdout.write(
-                self.style.SUCCESS('Created interval schedule: 30 seconds')
-            )
-        
-        price_task, price_task_created = PeriodicTask.objects.update_or_create(
-            name="Poll latest prices",
-            defaults={
-                "interval": price_schedule,
-                "task": "market.tasks.poll_latest_prices",
-                "args": json.dumps([]),
-                "enabled": True,
-                "description": "Poll latest prices for all active forex pairs every 30 seconds",
+        with transaction.atomic():
+            schedules = self._get_schedules({task[1] for task in PERIODIC_TASKS}, lines)
+            existing = {
+                name: current
+                for name, *current in PeriodicTask.objects.filter(
+                    name__in=[task[0] for task in PERIODIC_TASKS]
+                ).values_list("name", "interval_id", "task", "args", "enabled", "description")
             }
-        )
-        
-        if price_task_created:
-            created_count += 1
-            self.stdout.write(
-                self.style.SUCCESS('✓ Created periodic task: Poll latest prices')
-            )
-        else:
-            updated_count += 1
-            self.stdout.write(
-                self.style.WARNING('↻ Updated periodic task: Poll latest prices')
-            )
-        
-        # Then, set up candle aggregation tasks
-        self.stdout.write(self.style.SUCCESS('\n=== Setting up Candle Aggregation Tasks ==='))
-        
-        # Define intervals: (interval_name, every_seconds, description)
-        candle_intervals = [
-            ('5m', 300, '5 minutes'),      # Every 5 minutes
-            ('15m', 900, '15 minutes'),     # Every 15 minutes
-            ('1h', 3600, '1 hour'),         # Every 1 hour
-            ('1d', 86400, '1 day'),         # Every 1 day
-        ]
-        
-        for interval_name, every_seconds, description in candle_intervals:
-            # Create or get interval schedule
-            schedule, schedule_created = IntervalSchedule.objects.get_or_create(
-                every=every_seconds,
-                period=IntervalSchedule.SECONDS,
-            )
             
-            if schedule_created:
-                self.stdout.write(
-                    self.style.SUCCESS(f'Created interval schedule: {description} ({every_seconds}s)')
-                )
-            
-            # Create or update periodic task
-            task_name = f"Aggregate {interval_name} candles"
-            task, task_created = PeriodicTask.objects.update_or_create(
-                name=task_name,
-                defaults={
-                    "interval": schedule,
-                    "task": "market.tasks.aggregate_candles",
-                    "args": json.dumps([interval_name]),  # Pass interval as argument
+            for task_name, every_seconds, task_path, task_args, description in PERIODIC_TASKS:
+                defaults = {
+                    "interval_id": schedules[every_seconds],
+                    "task": task_path,
+                    "args": json.dumps(task_args),
                     "enabled": True,
-                    "description": f"Aggregate candle data from price snapshots at {description} interval",
+                    "description": description,
                 }
-            )
-            
-            if task_created:
-                created_count += 1
-                self.stdout.write(
-                    self.style.SUCCESS(f'✓ Created periodic task: {task_name}')
-                )
-            else:
-                updated_count += 1
-                self.stdout.write(
-                    self.style.WARNING(f'↻ Updated periodic task: {task_name}')
+                
+                # Skip the UPDATE on redeploys when the row is already current
+                current = existing.get(task_name)
+                if current is not None and self._is_current(current, defaults):
+                    unchanged_count += 1
+                    lines.append(f'  Periodic task up to date: {task_name}')
+                    continue
+                
+                # Create or update periodic task
+                task, task_created = PeriodicTask.objects.update_or_create(
+                    name=task_name,
+                    defaults=defaults,
                 )
+                
+                if task_created:
+                    created_count += 1
+                    lines.append(
+                        self.style.SUCCESS(f'✓ Created periodic task: {task_name}')
+                    )
+                else:
+                    updated_count += 1
+                    lines.append(
+                        self.style.WARNING(f'↻ Updated periodic task: {task_name}')
+                    )
         
-        self.stdout.write(
+        lines.append(
             self.style.SUCCESS(
-                f'\n✓ Setup complete: {created_count} created, {updated_count} updated'
+                f'\n✓ Setup complete: {created_count} created, {updated_count} updated, '
+                f'{unchanged_count} unchanged'
             )
         )
-        self.stdout.write(
+        lines.append(
             self.style.SUCCESS(
                 '\nAll periodic tasks are now scheduled:'
             )
         )
-        self.stdout.write(
+        lines.append(
             self.style.SUCCESS(
                 '  • Price polling: every 30 seconds'
             )
         )
-        self.stdout.write(
+        lines.append(
             self.style.SUCCESS(
                 '  • Candle aggregation: 5m, 15m, 1h, 1d intervals'
             )
         )
-        self.stdout.write(
+        lines.append(
+            self.style.SUCCESS(
+                '  • Price history partition maintenance: daily'
+            )
+        )
+        lines.append(
             self.style.WARNING(
                 '\n⚠ Make sure Celery Beat is running!'
             )
         )
-        self.stdout.write(
+        lines.append(
             self.style.WARNING(
                 'To start Celery Beat: celery -A core beat -l info'
             )
         )
+        self.stdout.write('\n'.join(lines))
+
+    @staticmethod
+    def _is_current(current, defaults):
+        """
+        Whether an existing PeriodicTask, as an
+        [interval_id, task, args, enabled, description] row, already matches.
+        """
+        return current == [
+            defaults["interval_id"],
+            defaults["task"],
+            defaults["args"],
+            defaults["enabled"],
+            defaults["description"],
+        ]
+
+    def _get_schedules(self, needed, lines):
+        """
+        Return {every_seconds: schedule id} for the needed intervals:
+        one SELECT, plus one multi-row INSERT for the missing ones.
+        """
+        schedules = dict(
+            IntervalSchedule.objects.filter(
+                every__in=needed, period=IntervalSchedule.SECONDS
+            ).values_list("every", "id")
+        )
+        missing = sorted(needed - schedules.keys())
+        if not missing:
+            return schedules
+
+        # IntervalSchedule has no unique (every, period) constraint to target
+        # with ON CONFLICT; a plain bulk_create returns the new primary keys
+        # (INSERT ... RETURNING), so no second SELECT is needed.
+        for schedule in IntervalSchedule.objects.bulk_create(
+            [IntervalSchedule(every=every, period=IntervalSchedule.SECONDS) for every in missing]
+        ):
+            schedules[schedule.every] = schedule.pk
+            lines.append(
+                self.style.SUCCESS(f'Created interval schedule: {schedule.every}s')
+            )
+        return schedules
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-15 20:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0002_forexpricehistory'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='forexpricehistory',
+            name='timestamp',
+            field=models.DateTimeField(),
+        ),
+    ]
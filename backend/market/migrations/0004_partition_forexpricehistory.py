@@ -0,0 +1,195 @@
+"""
+Convert forex_price_history into a table RANGE-partitioned by month on
+`timestamp` (Postgres only; other backends keep the plain table).
+
+Postgres requires the primary key of a partitioned table to include the
+partition key, so the table-level key becomes (id, timestamp). The Django
+model keeps `id` as its primary key; ids stay unique through the sequence.
+Further partitions are created/dropped by the
+`maintain_price_history_partitions` task. Reversing rebuilds the plain table.
+"""
+from datetime import date, timedelta
+
+from django.db import migrations
+
+
+TABLE = "forex_price_history"
+
+
+def _next_month(month):
+    return (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _is_partitioned(cursor):
+    cursor.execute(
+        "SELECT 1 FROM pg_partitioned_table pt "
+        "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = %s",
+        [TABLE],
+    )
+    return cursor.fetchone() is not None
+
+
+def _restore_pkey_name(cursor):
+    # The new table's primary key was named while the old table still held
+    # the default name (e.g. forex_price_history_pkey1); restore it now that
+    # the old table is gone
+    cursor.execute(
+        "SELECT con.conname FROM pg_constraint con "
+        "JOIN pg_class c ON c.oid = con.conrelid "
+        "WHERE c.relname = %s AND con.contype = 'p'",
+        [TABLE],
+    )
+    pkey = cursor.fetchone()[0]
+    if pkey != f"{TABLE}_pkey":
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME CONSTRAINT "{pkey}" TO "{TABLE}_pkey"')
+
+
+def partition_price_history(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != "postgresql":
+        return
+
+    with connection.cursor() as cursor:
+        if _is_partitioned(cursor):
+            return
+
+        # Secondary indexes are recreated on the partitioned parent by name,
+        # so later migrations can still alter them.
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes "
+            "WHERE tablename = %s AND indexname <> %s",
+            [TABLE, f"{TABLE}_pkey"],
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(f'SELECT MIN("timestamp"), MAX("timestamp") FROM "{TABLE}"')
+        oldest, newest = cursor.fetchone()
+
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX "{name}"')
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{TABLE}_old"')
+
+        cursor.execute(f'CREATE SEQUENCE "{TABLE}_part_id_seq"')
+        cursor.execute(f"""
+            CREATE TABLE "{TABLE}" (
+                "id" bigint NOT NULL DEFAULT nextval('{TABLE}_part_id_seq'),
+                "price" numeric(20, 8) NOT NULL,
+                "bid" numeric(20, 8) NOT NULL,
+                "ask" numeric(20, 8) NOT NULL,
+                "timestamp" timestamp with time zone NOT NULL,
+                "pair_id" bigint NOT NULL
+                    REFERENCES "forex_pair" ("id") DEFERRABLE INITIALLY DEFERRED,
+                PRIMARY KEY ("id", "timestamp")
+            ) PARTITION BY RANGE ("timestamp")
+        """)
+
+        # Monthly partitions from the oldest stored row through next month
+        # (or the newest row, if later), so every copied row lands in a
+        # monthly partition, plus a default partition so inserts never fail
+        # on a missing month. Rows written to the default later are moved
+        # out by PriceHistoryPartitionService.ensure_partitions.
+        today = date.today().replace(day=1)
+        month = oldest.date().replace(day=1) if oldest else today
+        last = _next_month(today)
+        if newest and newest.date() >= last:
+            last = newest.date().replace(day=1)
+        while month <= last:
+            cursor.execute(
+                f'CREATE TABLE "{TABLE}_p{month.year:04d}_{month.month:02d}" '
+                f'PARTITION OF "{TABLE}" FOR VALUES FROM (%s) TO (%s)',
+                [month.isoformat(), _next_month(month).isoformat()],
+            )
+            month = _next_month(month)
+        cursor.execute(f'CREATE TABLE "{TABLE}_default" PARTITION OF "{TABLE}" DEFAULT')
+
+        cursor.execute(
+            f'INSERT INTO "{TABLE}" ("id", "price", "bid", "ask", "timestamp", "pair_id") '
+            f'SELECT "id", "price", "bid", "ask", "timestamp", "pair_id" FROM "{TABLE}_old"'
+        )
+        # Run the deferred pair_id FK checks for the copied rows now:
+        # Postgres won't build indexes on a table with pending trigger events
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        cursor.execute(
+            f"SELECT setval('{TABLE}_part_id_seq', "
+            f'COALESCE((SELECT MAX("id") FROM "{TABLE}"), 0) + 1, false)'
+        )
+        cursor.execute(f'DROP TABLE "{TABLE}_old"')
+        cursor.execute(f'ALTER SEQUENCE "{TABLE}_part_id_seq" RENAME TO "{TABLE}_id_seq"')
+        cursor.execute(f'ALTER SEQUENCE "{TABLE}_id_seq" OWNED BY "{TABLE}"."id"')
+        _restore_pkey_name(cursor)
+
+        for _, indexdef in indexes:
+            cursor.execute(indexdef)
+
+
+def unpartition_price_history(apps, schema_editor):
+    """
+    Reverse: rebuild forex_price_history as the plain table of 0003 (single
+    column primary key, identity id) and copy the rows back.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != "postgresql":
+        return
+
+    with connection.cursor() as cursor:
+        if not _is_partitioned(cursor):
+            return
+
+        cursor.execute(
+            "SELECT i.relname, pg_get_indexdef(i.oid) FROM pg_index x "
+            "JOIN pg_class i ON i.oid = x.indexrelid "
+            "JOIN pg_class t ON t.oid = x.indrelid "
+            "WHERE t.relname = %s AND NOT x.indisprimary",
+            [TABLE],
+        )
+        indexes = cursor.fetchall()
+
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX "{name}"')
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{TABLE}_old"')
+
+        cursor.execute(f"""
+            CREATE TABLE "{TABLE}" (
+                "id" bigint NOT NULL PRIMARY KEY GENERATED BY DEFAULT AS IDENTITY,
+                "price" numeric(20, 8) NOT NULL,
+                "bid" numeric(20, 8) NOT NULL,
+                "ask" numeric(20, 8) NOT NULL,
+                "timestamp" timestamp with time zone NOT NULL,
+                "pair_id" bigint NOT NULL
+                    REFERENCES "forex_pair" ("id") DEFERRABLE INITIALLY DEFERRED
+            )
+        """)
+        cursor.execute(
+            f'INSERT INTO "{TABLE}" ("id", "price", "bid", "ask", "timestamp", "pair_id") '
+            f"OVERRIDING SYSTEM VALUE "
+            f'SELECT "id", "price", "bid", "ask", "timestamp", "pair_id" FROM "{TABLE}_old"'
+        )
+        # Run the deferred pair_id FK checks for the copied rows now:
+        # Postgres won't build indexes on a table with pending trigger events
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        cursor.execute(f"SELECT pg_get_serial_sequence('\"{TABLE}\"', 'id')")
+        sequence = cursor.fetchone()[0]
+        cursor.execute(
+            f"SELECT setval(%s, "
+            f'COALESCE((SELECT MAX("id") FROM "{TABLE}"), 0) + 1, false)',
+            [sequence],
+        )
+        # Drops the partitions and the id sequence owned by the old table too
+        cursor.execute(f'DROP TABLE "{TABLE}_old"')
+        _restore_pkey_name(cursor)
+        # Same for the identity sequence (created as ..._id_seq1)
+        if sequence.split(".")[-1] != f"{TABLE}_id_seq":
+            cursor.execute(f'ALTER SEQUENCE {sequence} RENAME TO "{TABLE}_id_seq"')
+
+        for _, indexdef in indexes:
+            cursor.execute(indexdef)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0003_forexpricehistory_drop_timestamp_db_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_price_history, unpartition_price_history),
+    ]
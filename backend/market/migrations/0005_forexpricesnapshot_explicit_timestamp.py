@@ -0,0 +1,19 @@
+# Generated by Django 5.2.11 on 2026-10-15 20:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0004_partition_forexpricehistory'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='forexpricesnapshot',
+            name='timestamp',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+    ]
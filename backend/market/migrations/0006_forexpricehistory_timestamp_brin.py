@@ -0,0 +1,22 @@
+# Generated by Django 5.2.11 on 2026-10-15 20:12
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0005_forexpricesnapshot_explicit_timestamp'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='forexpricehistory',
+            name='forex_price_timesta_75c8ea_idx',
+        ),
+        migrations.AddIndex(
+            model_name='forexpricehistory',
+            index=django.contrib.postgres.indexes.BrinIndex(fields=['timestamp'], name='forex_price_history_ts_brin', pages_per_range=32),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.11 on 2026-10-15 20:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0006_forexpricehistory_timestamp_brin'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='forexpair',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['symbol'], name='forex_pair_active_idx'),
+        ),
+    ]
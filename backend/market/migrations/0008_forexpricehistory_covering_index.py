@@ -0,0 +1,21 @@
+# Generated by Django 5.2.11 on 2026-10-15 20:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0007_forexpair_active_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='forexpricehistory',
+            name='forex_price_pair_id_237969_idx',
+        ),
+        migrations.AddIndex(
+            model_name='forexpricehistory',
+            index=models.Index(fields=['pair', '-timestamp'], include=('price',), name='forex_price_hist_pair_ts_inc'),
+        ),
+    ]
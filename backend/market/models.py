@@ -1,8 +1,17 @@
+from django.contrib.postgres.indexes import BrinIndex
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 from django.core.validators import MinValueValidator
 
 
+class ActivePairManager(models.Manager):
+    """Only pairs with is_active=True (served by forex_pair_active_idx)"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_active=True)
+
+
 class ForexPair(models.Model):
     """Forex currency pair model"""
     symbol = models.CharField(max_length=10, unique=True, db_index=True)
@@ -11,10 +20,14 @@ class ForexPair(models.Model):
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = models.Manager()
+    active_objects = ActivePairManager()
+
     class Meta:
         db_table = 'forex_pair'
         indexes = [
             models.Index(fields=['base_currency', 'quote_currency']),
+            models.Index(fields=['symbol'], name='forex_pair_active_idx', condition=models.Q(is_active=True)),
         ]
 
     def __str__(self):
@@ -50,6 +63,7 @@ class ForexCandle(models.Model):
         ]
 
     def __str__(self):
+        # Dereferences pair: select_related('pair') when rendering many rows
         return f"{self.pair.symbol} {self.timeframe} {self.timestamp}"
 
 
@@ -59,7 +73,8 @@ class ForexPriceSnapshot(models.Model):
     price = models.DecimalField(max_digits=20, decimal_places=8, validators=[MinValueValidator(0)])
     bid = models.DecimalField(max_digits=20, decimal_places=8, validators=[MinValueValidator(0)])
     ask = models.DecimalField(max_digits=20, decimal_places=8, validators=[MinValueValidator(0)])
-    timestamp = models.DateTimeField(auto_now=True, db_index=True)
+    # Set explicitly by writers (no auto_now) so snapshots can be bulk upserted
+    timestamp = models.DateTimeField(default=timezone.now, db_index=True)
 
     class Meta:
         db_table = 'forex_price_snapshot'
@@ -70,6 +85,23 @@ class ForexPriceSnapshot(models.Model):
     def __str__(self):
         return f"{self.pair.symbol} @ {self.price}"
 
+    @classmethod
+    def bulk_upsert(cls, rows, timestamp=None):
+        """
+        Insert or update the snapshots of several pairs in one
+        INSERT ... ON CONFLICT (pair_id) DO UPDATE statement.
+        rows: dicts of field values (pair or pair_id, price, bid, ask, and
+        optionally their own timestamp, which takes precedence).
+        Returns the snapshot instances.
+        """
+        timestamp = timestamp or timezone.now()
+        return cls.objects.bulk_create(
+            [cls(**{"timestamp": timestamp, **row}) for row in rows],
+            update_conflicts=True,
+            unique_fields=['pair'],
+            update_fields=['price', 'bid', 'ask', 'timestamp'],
+        )
+
 
 class ForexPriceHistory(models.Model):
     """Historical price snapshots for aggregating candles"""
@@ -77,13 +109,23 @@ class ForexPriceHistory(models.Model):
     price = models.DecimalField(max_digits=20, decimal_places=8, validators=[MinValueValidator(0)])
     bid = models.DecimalField(max_digits=20, decimal_places=8, validators=[MinValueValidator(0)])
     ask = models.DecimalField(max_digits=20, decimal_places=8, validators=[MinValueValidator(0)])
-    timestamp = models.DateTimeField(db_index=True)
+    # No B-tree on timestamp alone: aggregation scans use (pair, -timestamp)
+    # and global time-range scans (admin) use the BRIN index below.
+    timestamp = models.DateTimeField()
 
     class Meta:
         db_table = 'forex_price_history'
         indexes = [
-            models.Index(fields=['pair', '-timestamp']),
-            models.Index(fields=['-timestamp']),
+            # Covering: aggregate_candles reads (pair, timestamp, price) only,
+            # so its scan is served index-only without heap fetches
+            models.Index(
+                fields=['pair', '-timestamp'],
+                include=['price'],
+                name='forex_price_hist_pair_ts_inc',
+            ),
+            # Rows are appended in timestamp order, so a BRIN summary per 32
+            # pages prunes ranges at a fraction of a B-tree's write cost
+            BrinIndex(fields=['timestamp'], pages_per_range=32, name='forex_price_history_ts_brin'),
         ]
         ordering = ['-timestamp']
 
@@ -1,10 +1,12 @@
-from .base import MarketDataProvider
+from .base import MarketDataProvider, PROVIDERS, register
 from .twelve_data import TwelveDataProvider
 from .forexrateapi import ForexRateAPIProvider
 from .mock import MockMarketDataProvider
 
 __all__ = [
     'MarketDataProvider',
+    'PROVIDERS',
+    'register',
     'TwelveDataProvider',
     'ForexRateAPIProvider',
     'MockMarketDataProvider',
@@ -1,20 +1,20 @@
-from abc import ABC, abstractmethod
-from typing import List, Dict
+import calendar
 from decimal import Decimal
+from typing import Callable, List, Dict, Optional, Protocol
 
-class MarketDataProvider(ABC):
+class MarketDataProvider(Protocol):
     """
     Base contract for all market data providers.
+    Structural: providers implement these methods without subclassing,
+    so calls are plain method lookups with no ABC dispatch.
     """
 
-    @abstractmethod
     def get_latest_price(self, symbol: str) -> Dict:
         """
         Returns latest price for a symbol.
         """
-        pass
+        ...
 
-    @abstractmethod
     def get_candles(
         self,
         symbol: str,
@@ -22,16 +22,60 @@ class MarketDataProvider(ABC):
         limit: int = 100
     ) -> List[Dict]:
         """
-        Returns OHLC candles.
+        Returns OHLC candles, normalized as:
+        {"timestamp": 1707475200, "open": Decimal("1.0820"),
+         "high": Decimal("1.0850"), "low": Decimal("1.0810"),
+         "close": Decimal("1.0842"), "volume": None}
         """
-        pass
-
-# for normalization
-candle_format = {
-    "timestamp": 1707475200,
-    "open": Decimal("1.0820"),
-    "high": Decimal("1.0850"),
-    "low": Decimal("1.0810"),
-    "close": Decimal("1.0842"),
-    "volume": None
-}
+        ...
+
+
+# Concrete providers by name, filled at import time by @register
+PROVIDERS: dict[str, type[MarketDataProvider]] = {}
+
+
+def register(name: str) -> Callable[[type], type]:
+    """
+    Class decorator adding a provider to PROVIDERS under `name`.
+    """
+    def decorator(cls: type) -> type:
+        PROVIDERS[name] = cls
+        return cls
+    return decorator
+
+
+def utc_epoch(date_str: str, time_str: str = "00:00:00") -> int:
+    """
+    Epoch seconds for a UTC "YYYY-MM-DD" date and "HH:MM:SS" time.
+    Fixed-position slicing + calendar.timegm instead of datetime.strptime,
+    which re-interprets the format string on every call.
+    Raises ValueError on malformed input.
+    """
+    if len(date_str) != 10 or len(time_str) != 8:
+        raise ValueError(f"Invalid UTC datetime: {date_str} {time_str}")
+    return calendar.timegm((
+        int(date_str[0:4]), int(date_str[5:7]), int(date_str[8:10]),
+        int(time_str[0:2]), int(time_str[3:5]), int(time_str[6:8]),
+        0, 0, 0,
+    ))
+
+
+def make_candle(
+    timestamp: int,
+    open_: Decimal,
+    high: Decimal,
+    low: Decimal,
+    close: Decimal,
+    volume: Optional[Decimal] = None,
+) -> Dict:
+    """
+    Build one normalized candle dict (see MarketDataProvider.get_candles).
+    """
+    return {
+        "timestamp": timestamp,
+        "open": open_,
+        "high": high,
+        "low": low,
+        "close": close,
+        "volume": volume,
+    }
@@ -1,24 +1,87 @@
+import heapq
+import json
 import os
-import requests
 import time
 import logging
-from decimal import Decimal
-from typing import List, Dict
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from operator import itemgetter
+from decimal import Context, Decimal, ROUND_HALF_UP
+from typing import List, Dict, Tuple
 from datetime import datetime, timezone, timedelta
 
-from .base import MarketDataProvider
+from .base import make_candle, register, utc_epoch
+from .http_session import build_session
 
 logger = logging.getLogger(__name__)
 
+# Forex rates never need more than ~10 significant digits; a bounded
+# context keeps Decimal division cheap compared to the default 28 digits
+_FX_CTX = Context(prec=12, rounding=ROUND_HALF_UP)
+_ONE = Decimal(1)
+# Prices are stored with 8 decimal places (DecimalField(decimal_places=8));
+# derived rates are rounded to that before they are cached or returned
+PRICE_QUANTUM = Decimal("1e-8")
 
-class ForexRateAPIProvider(MarketDataProvider):
+
+def _parse_json(response) -> dict:
+    """
+    Decode a ForexRateAPI response with JSON numbers parsed straight into
+    Decimal (no lossy float -> str -> Decimal round trip).
+    Non-2xx responses (often HTML error pages) raise before any parsing.
+    """
+    if not response.ok:
+        raise RuntimeError(
+            f"ForexRateAPI HTTP {response.status_code}: {response.text[:200]}"
+        )
+    return json.loads(response.content, parse_float=Decimal)
+
+
+def _iter_candles(hourly_data: dict):
+    """
+    Yield one candle dict per valid entry of an /hourly response, in no
+    particular order; invalid entries are skipped.
+    """
+    for date_str, day_data in hourly_data.items():
+        for time_str, candle_data in day_data.items():
+            try:
+                # date "2025-11-03", time "00:00:00";
+                # ForexRateAPI doesn't provide volume
+                yield make_candle(
+                    utc_epoch(date_str, time_str),
+                    Decimal(candle_data.get("open", 0)),
+                    Decimal(candle_data.get("high", 0)),
+                    Decimal(candle_data.get("low", 0)),
+                    Decimal(candle_data.get("close", 0)),
+                )
+            except (ValueError, KeyError, TypeError):
+                continue  # Skip invalid entries
+
+
+@register("forexrateapi")
+class ForexRateAPIProvider:
     """
     ForexRateAPI provider implementation.
     Documentation: https://forexrateapi.com/documentation
     """
 
+    __slots__ = ("api_key",)
+
     BASE_URL = "https://api.forexrateapi.com/v1"
 
+    # Shared by all instances: keep-alive connections are reused across calls
+    _session = build_session()
+
+    # Upper bound on concurrent per-base-currency batch requests
+    MAX_BATCH_WORKERS = 8
+
+    # Process-wide pool for batch requests, created on first use so that each
+    # forked worker process gets its own threads
+    _executor = None
+    _executor_lock = threading.Lock()
+
     # ForexRateAPI hourly endpoint supports hourly data
     # For other intervals, we'll need to use timeframe endpoint or aggregate
     INTERVAL_MAP = {
@@ -33,6 +96,7 @@ class ForexRateAPIProvider(MarketDataProvider):
             raise RuntimeError("FOREX_RATE_API_KEY not set")
 
     @staticmethod
+    @lru_cache(maxsize=1024)
     def _parse_symbol(symbol: str) -> tuple:
         """
         Parse normalized symbol (EURUSD) into base and quote currencies.
@@ -54,6 +118,9 @@ class ForexRateAPIProvider(MarketDataProvider):
         Uses ForexRateAPI /latest endpoint.
         """
         base_currency, quote_currency = self._parse_symbol(symbol)
+        if base_currency == quote_currency:
+            # Identity pair (EUR/EUR) is always 1, no request needed
+            return self._batch_result(symbol, _ONE, int(time.time()))
 
         url = f"{self.BASE_URL}/latest"
         params = {
@@ -62,8 +129,8 @@ class ForexRateAPIProvider(MarketDataProvider):
             "currencies": quote_currency,
         }
 
-        response = requests.get(url, params=params, timeout=10)
-        data = response.json()
+        response = self._session.get(url, params=params, timeout=10)
+        data = _parse_json(response)
 
         # Error handling
         if not data.get("success", False):
@@ -79,7 +146,7 @@ class ForexRateAPIProvider(MarketDataProvider):
                 f"ForexRateAPI: Quote currency {quote_currency} not found in response for {symbol}"
             )
 
-        price = Decimal(str(rates[quote_currency]))
+        price = Decimal(rates[quote_currency])
         
         # ForexRateAPI doesn't provide bid/ask separately in latest endpoint
         # Use the same price for both
@@ -98,8 +165,10 @@ class ForexRateAPIProvider(MarketDataProvider):
         Uses batch requests and rate inversion to minimize API calls.
         
         Strategy:
-        1. Group pairs by base currency
-        2. Fetch multiple quote currencies in single batch request
+        1. Fetch every currency against USD in one request and derive each
+           pair as a cross rate (GBP/EUR = USD/EUR / USD/GBP)
+        2. For pairs the USD request didn't cover, group by base currency
+           and fetch multiple quote currencies in single batch request
         3. Use rate inversion to avoid duplicate calls (EUR/USD = 1 / USD/EUR)
         
         Returns: Dict mapping symbol -> price data
@@ -107,77 +176,57 @@ class ForexRateAPIProvider(MarketDataProvider):
         if not symbols:
             return {}
         
+        results = {}
+        fetched_rates = {}  # Cache for rate inversion: (base, quote) -> rate
+        now_epoch = int(time.time())  # One timestamp for the whole batch
+
         # Parse all symbols
         parsed_pairs = {}
         for symbol in symbols:
             try:
                 base, quote = self._parse_symbol(symbol)
-                parsed_pairs[symbol] = (base, quote)
             except ValueError as e:
                 logger.warning(f"Invalid symbol format {symbol}: {e}")
                 continue
+            if base == quote:
+                # Identity pair (EUR/EUR) is always 1, no request needed
+                results[symbol] = self._batch_result(symbol, _ONE, now_epoch)
+                continue
+            parsed_pairs[symbol] = (base, quote)
         
         if not parsed_pairs:
-            return {}
-        
-        results = {}
-        fetched_rates = {}  # Cache for rate inversion: (base, quote) -> rate
+            return results
+
+        # Single USD-pivot request; pairs it can't price fall through to
+        # the per-base requests below (e.g. plans without USD base access)
+        usd_rates = self._fetch_usd_rates(
+            {currency for pair in parsed_pairs.values() for currency in pair}
+        )
+        for symbol, (base, quote) in list(parsed_pairs.items()):
+            if base in usd_rates and quote in usd_rates:
+                rate = _FX_CTX.divide(usd_rates[quote], usd_rates[base])
+                results[symbol] = self._batch_result(symbol, rate, now_epoch)
+                del parsed_pairs[symbol]
+
+        if not parsed_pairs:
+            return results
         
         # Group pairs by base currency for batch requests
-        base_groups = {}
+        base_groups = defaultdict(list)
         for symbol, (base, quote) in parsed_pairs.items():
-            if base not in base_groups:
-                base_groups[base] = []
             base_groups[base].append((symbol, quote))
         
-        # Fetch rates in batches (one call per base currency)
-        for base_currency, pairs in base_groups.items():
-            # Get all unique quote currencies for this base
-            quote_currencies = list(set(quote for _, quote in pairs))
-            
-            # Make batch request: base=EUR, currencies=USD,GBP,JPY
-            url = f"{self.BASE_URL}/latest"
-            params = {
-                "api_key": self.api_key,
-                "base": base_currency,
-                "currencies": ",".join(quote_currencies),  # Batch: multiple currencies
-            }
-            
-            try:
-                response = requests.get(url, params=params, timeout=10)
-                data = response.json()
-                
-                if not data.get("success", False):
-                    error = data.get("error", {})
-                    error_msg = error.get("info", "Unknown error")
-                    logger.warning(
-                        f"ForexRateAPI batch error for base {base_currency}: {error_msg}"
-                    )
-                    continue
-                
-                rates = data.get("rates", {})
-                
-                # Store results and cache for inversion
-                for symbol, quote_currency in pairs:
-                    if quote_currency in rates:
-                        rate = Decimal(str(rates[quote_currency]))
-                        fetched_rates[(base_currency, quote_currency)] = rate
-                        
-                        results[symbol] = {
-                            "symbol": symbol,
-                            "price": rate,
-                            "bid": rate,
-                            "ask": rate,
-                            "timestamp": int(time.time()),
-                            "provider": "forexrateapi"
-                        }
-            
-            except Exception as e:
-                logger.warning(
-                    f"Error fetching batch for base {base_currency}: {e}",
-                    exc_info=True
-                )
-                continue
+        # Fetch rates in batches (one call per base currency), concurrently:
+        # each batch is one HTTPS round-trip, so threads overlap the waits
+        executor = self._get_executor()
+        futures = [
+            executor.submit(self._fetch_base, base_currency, pairs, now_epoch)
+            for base_currency, pairs in base_groups.items()
+        ]
+        for future in as_completed(futures):
+            base_results, base_rates = future.result()
+            results.update(base_results)
+            fetched_rates.update(base_rates)
         
         # Handle inverses: if we have EUR/USD, calculate USD/EUR = 1 / (EUR/USD)
         for symbol, (base, quote) in parsed_pairs.items():
@@ -189,14 +238,7 @@ class ForexRateAPIProvider(MarketDataProvider):
                         # Calculate inverse: USD/EUR = 1 / (EUR/USD)
                         inverse_rate = self._calculate_inverse_rate(fetched_rates[inverse_key])
                         
-                        results[symbol] = {
-                            "symbol": symbol,
-                            "price": inverse_rate,
-                            "bid": inverse_rate,
-                            "ask": inverse_rate,
-                            "timestamp": int(time.time()),
-                            "provider": "forexrateapi"
-                        }
+                        results[symbol] = self._batch_result(symbol, inverse_rate, now_epoch)
                         logger.debug(f"Calculated inverse rate for {symbol} from {quote}/{base}")
                     except (ValueError, ZeroDivisionError) as e:
                         logger.warning(f"Cannot calculate inverse for {symbol}: {e}")
@@ -204,6 +246,129 @@ class ForexRateAPIProvider(MarketDataProvider):
         return results
 
     @staticmethod
+    def _batch_result(symbol: str, rate: Decimal, now_epoch: int) -> Dict:
+        """
+        Price data for one symbol at a known rate, built as a single literal.
+        The latest endpoint has no separate bid/ask, so the rate is used for both.
+        """
+        rate = rate.quantize(PRICE_QUANTUM, context=_FX_CTX)
+        return {
+            "symbol": symbol,
+            "price": rate,
+            "bid": rate,
+            "ask": rate,
+            "timestamp": now_epoch,
+            "provider": "forexrateapi",
+        }
+
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        """
+        Return the shared batch executor, reused across polls instead of
+        spawning and joining a new set of threads on every call.
+        """
+        if cls._executor is None:
+            with cls._executor_lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(
+                        max_workers=cls.MAX_BATCH_WORKERS,
+                        thread_name_prefix="forexrateapi",
+                    )
+        return cls._executor
+
+    def _fetch_usd_rates(self, currencies: set) -> Dict[str, Decimal]:
+        """
+        Fetch the rate of every currency against USD in a single request.
+        Returns currency -> units per USD (USD itself is 1); only non-zero
+        rates are kept. Empty on error.
+        """
+        quote_currencies = sorted(currencies - {"USD"})
+        if not quote_currencies:
+            return {}
+
+        url = f"{self.BASE_URL}/latest"
+        params = {
+            "api_key": self.api_key,
+            "base": "USD",
+            "currencies": ",".join(quote_currencies),
+        }
+
+        try:
+            response = self._session.get(url, params=params, timeout=10)
+            data = _parse_json(response)
+        except Exception as e:
+            logger.warning(f"Error fetching USD pivot rates: {e}", exc_info=True)
+            return {}
+
+        if not data.get("success", False):
+            error = data.get("error", {})
+            error_msg = error.get("info", "Unknown error")
+            logger.warning(f"ForexRateAPI USD pivot error: {error_msg}")
+            return {}
+
+        usd_rates = {"USD": _ONE}
+        for currency, rate in data.get("rates", {}).items():
+            if rate:
+                usd_rates[currency] = Decimal(rate)
+        return usd_rates
+
+    def _fetch_base(
+        self,
+        base_currency: str,
+        pairs: List[tuple],
+        now_epoch: int
+    ) -> Tuple[Dict[str, Dict], Dict[tuple, Decimal]]:
+        """
+        Fetch all quote currencies of one base currency in a single request.
+        pairs: (symbol, quote_currency) tuples; now_epoch stamps the results.
+        Returns (symbol -> price data, (base, quote) -> rate); both empty on error.
+        """
+        results = {}
+        fetched_rates = {}
+
+        # Get all unique quote currencies for this base
+        quote_currencies = list(set(quote for _, quote in pairs))
+        
+        # Make batch request: base=EUR, currencies=USD,GBP,JPY
+        url = f"{self.BASE_URL}/latest"
+        params = {
+            "api_key": self.api_key,
+            "base": base_currency,
+            "currencies": ",".join(quote_currencies),  # Batch: multiple currencies
+        }
+        
+        try:
+            response = self._session.get(url, params=params, timeout=10)
+            data = _parse_json(response)
+            
+            if not data.get("success", False):
+                error = data.get("error", {})
+                error_msg = error.get("info", "Unknown error")
+                logger.warning(
+                    f"ForexRateAPI batch error for base {base_currency}: {error_msg}"
+                )
+                return results, fetched_rates
+            
+            rates = data.get("rates", {})
+            
+            # Store results and cache for inversion
+            for symbol, quote_currency in pairs:
+                if quote_currency in rates:
+                    rate = Decimal(rates[quote_currency])
+                    fetched_rates[(base_currency, quote_currency)] = rate
+                    
+                    results[symbol] = self._batch_result(symbol, rate, now_epoch)
+        
+        except Exception as e:
+            logger.warning(
+                f"Error fetching batch for base {base_currency}: {e}",
+                exc_info=True
+            )
+        
+        return results, fetched_rates
+
+    @staticmethod
+    @lru_cache(maxsize=256)
     def _calculate_inverse_rate(rate: Decimal) -> Decimal:
         """
         Calculate inverse rate: 1 / rate
@@ -211,7 +376,7 @@ class ForexRateAPIProvider(MarketDataProvider):
         """
         if rate == 0:
             raise ValueError("Cannot calculate inverse of zero rate")
-        return Decimal("1") / rate
+        return _FX_CTX.divide(_ONE, rate).quantize(PRICE_QUANTUM, context=_FX_CTX)
 
     def get_candles(
         self,
@@ -284,8 +449,8 @@ class ForexRateAPIProvider(MarketDataProvider):
             "end_date": end_date.strftime("%Y-%m-%d"),
         }
 
-        response = requests.get(url, params=params, timeout=10)
-        data = response.json()
+        response = self._session.get(url, params=params, timeout=10)
+        data = _parse_json(response)
 
         if not data.get("success", False):
             error = data.get("error", {})
@@ -304,8 +469,6 @@ class ForexRateAPIProvider(MarketDataProvider):
                 f"This may indicate the basic plan doesn't support hourly historical data."
             )
         
-        candles = []
-
         # ForexRateAPI returns hourly data in format:
         # {
         #   "2025-11-03": {
@@ -314,30 +477,12 @@ class ForexRateAPIProvider(MarketDataProvider):
         #     ...
         #   }
         # }
-        
-        # Collect all candles
-        for date_str in sorted(hourly_data.keys(), reverse=True):
-            day_data = hourly_data[date_str]
-            for time_str, candle_data in day_data.items():
-                try:
-                    # Parse datetime: "2025-11-03 00:00:00"
-                    dt_str = f"{date_str} {time_str}"
-                    dt = datetime.strptime(dt_str, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
-                    
-                    candles.append({
-                        "timestamp": int(dt.timestamp()),
-                        "open": Decimal(str(candle_data.get("open", 0))),
-                        "high": Decimal(str(candle_data.get("high", 0))),
-                        "low": Decimal(str(candle_data.get("low", 0))),
-                        "close": Decimal(str(candle_data.get("close", 0))),
-                        "volume": None,  # ForexRateAPI doesn't provide volume
-                    })
-                except (ValueError, KeyError, TypeError):
-                    continue  # Skip invalid entries
-
-        # Sort by timestamp descending (newest first) and limit
-        candles.sort(key=lambda x: x["timestamp"], reverse=True)
-        return candles[:limit]
+
+        # Newest `limit` candles first, via a bounded heap instead of
+        # sorting every candle in the range
+        return heapq.nlargest(
+            limit, _iter_candles(hourly_data), key=itemgetter("timestamp")
+        )
 
     def _get_daily_candles(
         self,
@@ -363,8 +508,8 @@ class ForexRateAPIProvider(MarketDataProvider):
             "end_date": end_date.strftime("%Y-%m-%d"),
         }
 
-        response = requests.get(url, params=params, timeout=10)
-        data = response.json()
+        response = self._session.get(url, params=params, timeout=10)
+        data = _parse_json(response)
 
         if not data.get("success", False):
             error = data.get("error", {})
@@ -380,21 +525,12 @@ class ForexRateAPIProvider(MarketDataProvider):
             if quote_currency not in day_rates:
                 continue
 
-            rate = Decimal(str(day_rates[quote_currency]))
+            rate = Decimal(day_rates[quote_currency])
             
             try:
-                dt = datetime.strptime(date_str, "%Y-%m-%d").replace(tzinfo=timezone.utc)
-                
                 # ForexRateAPI timeframe only provides close rates, not OHLC
                 # Use the rate for all OHLC values
-                candles.append({
-                    "timestamp": int(dt.timestamp()),
-                    "open": rate,
-                    "high": rate,
-                    "low": rate,
-                    "close": rate,
-                    "volume": None,
-                })
+                candles.append(make_candle(utc_epoch(date_str), rate, rate, rate, rate))
             except (ValueError, KeyError):
                 continue
 
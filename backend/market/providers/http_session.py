@@ -0,0 +1,29 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def build_session(pool_connections: int = 10, pool_maxsize: int = 50) -> requests.Session:
+    """
+    Build a requests.Session for a provider: pooled keep-alive connections
+    (no TCP/TLS handshake per call) and retries with backoff on transient
+    HTTP errors.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.2,
+            # 429 (quota) is not retried: callers see it as an HTTP error.
+            # Retry-After is ignored so a long value can't park the calling
+            # thread outside the per-request timeout
+            status_forcelist=[500, 502, 503, 504],
+            allowed_methods=["GET"],
+            respect_retry_after_header=False,
+        ),
+    )
+    session.mount("https://", adapter)
+    session.headers["Connection"] = "keep-alive"
+    return session
@@ -1,10 +1,22 @@
 from decimal import Decimal
 from typing import List, Dict
-from .base import MarketDataProvider
+from .base import register
 import time
 
 
-class MockMarketDataProvider(MarketDataProvider):
+# Every mock candle has the same OHLC; Decimals are built once at import
+_MOCK_TEMPLATE = {
+    "open": Decimal("1.2300"),
+    "high": Decimal("1.2350"),
+    "low": Decimal("1.2280"),
+    "close": Decimal("1.2345"),
+    "volume": None,
+}
+
+@register("mock")
+class MockMarketDataProvider:
+
+    __slots__ = ()
 
     def get_latest_price(self, symbol: str) -> Dict:
         return {
@@ -22,16 +34,7 @@ class MockMarketDataProvider(MarketDataProvider):
     ) -> List[Dict]:
 
         now = int(time.time())
-        candles = []
-
-        for i in range(limit):
-            candles.append({
-                "timestamp": now - i * 60,
-                "open": Decimal("1.2300"),
-                "high": Decimal("1.2350"),
-                "low": Decimal("1.2280"),
-                "close": Decimal("1.2345"),
-                "volume": None
-            })
-
-        return candles
+        return [
+            {"timestamp": now - i * 60, **_MOCK_TEMPLATE}
+            for i in range(limit)
+        ]
@@ -1,16 +1,24 @@
 import os
-import requests
 import time
+from functools import lru_cache
 from decimal import Decimal
 from typing import List, Dict
 
-from .base import MarketDataProvider
-from datetime import datetime, timezone
+import orjson
 
-class TwelveDataProvider(MarketDataProvider):
+from .base import make_candle, register, utc_epoch
+from .http_session import build_session
+
+@register("twelve_data")
+class TwelveDataProvider:
+
+    __slots__ = ("api_key",)
 
     BASE_URL = "https://api.twelvedata.com"
 
+    # Shared by all instances: keep-alive connections are reused across calls
+    _session = build_session()
+
     INTERVAL_MAP = {
         "1m": "1min",
         "5m": "5min",
@@ -25,6 +33,7 @@ class TwelveDataProvider(MarketDataProvider):
             raise RuntimeError("TWELVE_DATA_API_KEY not set")
 
     @staticmethod
+    @lru_cache(maxsize=1024)
     def _denormalize_symbol(symbol: str) -> str:
         """
         Convert normalized symbol (EURUSD) to API format (EUR/USD).
@@ -54,11 +63,16 @@ class TwelveDataProvider(MarketDataProvider):
             "apikey": self.api_key
         }
 
-        response = requests.get(url, params=params, timeout=10)
-        data = response.json()
+        response = self._session.get(url, params=params, timeout=10)
+        if not response.ok:
+            raise RuntimeError(
+                f"TwelveData HTTP {response.status_code} for {api_symbol} "
+                f"(normalized: {symbol}): {response.text[:200]}"
+            )
+        data = orjson.loads(response.content)
 
-        # Error handling (Twelve Data style)
-        if response.status_code != 200 or "price" not in data:
+        # Error handling (Twelve Data reports errors in a 200 body)
+        if "price" not in data:
             raise RuntimeError(
                 f"TwelveData error for {api_symbol} (normalized: {symbol}): {data}"
             )
@@ -104,10 +118,15 @@ class TwelveDataProvider(MarketDataProvider):
             "apikey": self.api_key,
         }
 
-        response = requests.get(url, params=params, timeout=10)
-        data = response.json()
+        response = self._session.get(url, params=params, timeout=10)
+        if not response.ok:
+            raise RuntimeError(
+                f"TwelveData candle HTTP {response.status_code} for {api_symbol} "
+                f"(normalized: {symbol}): {response.text[:200]}"
+            )
+        data = orjson.loads(response.content)
 
-        if response.status_code != 200 or "values" not in data:
+        if "values" not in data:
             raise RuntimeError(
                 f"TwelveData candle error for {api_symbol} (normalized: {symbol}): {data}"
             )
@@ -115,18 +134,15 @@ class TwelveDataProvider(MarketDataProvider):
         candles = []
 
         for item in data["values"]:
-            dt = datetime.strptime(
-                item["datetime"],
-                "%Y-%m-%d %H:%M:%S"
-            ).replace(tzinfo=timezone.utc)
-
-            candles.append({
-                "timestamp": int(dt.timestamp()),
-                "open": Decimal(item["open"]),
-                "high": Decimal(item["high"]),
-                "low": Decimal(item["low"]),
-                "close": Decimal(item["close"]),
-                "volume": None,
-            })
+            # "2024-02-09 10:00:00", or just the date for daily candles
+            dt_str = item["datetime"]
+
+            candles.append(make_candle(
+                utc_epoch(dt_str[:10], dt_str[11:] or "00:00:00"),
+                Decimal(item["open"]),
+                Decimal(item["high"]),
+                Decimal(item["low"]),
+                Decimal(item["close"]),
+            ))
 
         return candles
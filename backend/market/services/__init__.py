@@ -1,4 +1,5 @@
 from .pair_services import PairService
 from .price_services import PriceService
+from .partition_services import PriceHistoryPartitionService
 
-__all__ = ['PairService', 'PriceService']
\ No newline at end of file
+__all__ = ['PairService', 'PriceService', 'PriceHistoryPartitionService']
\ No newline at end of file
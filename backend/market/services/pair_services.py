@@ -1,6 +1,32 @@
-from typing import List
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional
 
 from market.models import ForexPair
+from cache.services import CacheService
+
+# Pair rows change rarely: in-process lookups are cached per time bucket of
+# this many seconds, and cleared immediately on ForexPair save/delete (signals).
+PAIR_CACHE_SECONDS = 60
+
+
+def _cache_bucket() -> int:
+    return int(time.time() // PAIR_CACHE_SECONDS)
+
+
+@lru_cache(maxsize=512)
+def _get_pair_cached(normalized_symbol: str, bucket: int) -> Optional[ForexPair]:
+    """
+    ForexPair by symbol (active or not), or None. `bucket` expires entries.
+    Only the fields callers use are loaded: the pk (as an FK target),
+    symbol and is_active.
+    """
+    return (
+        ForexPair.objects
+        .only("id", "symbol", "is_active")
+        .filter(symbol=normalized_symbol)
+        .first()
+    )
 
 
 class PairService:
@@ -15,15 +41,21 @@ class PairService:
         """
         return symbol.replace("/", "").upper()
 
+    @staticmethod
+    def clear_local_cache() -> None:
+        """
+        Drop the in-process pair lookups (called when a pair changes).
+        """
+        _get_pair_cached.cache_clear()
+
     @staticmethod
     def validate_pair(symbol: str) -> None:
         """
         Raises ValueError if pair does not exist or is inactive.
         """
         normalized_symbol = PairService._normalize_symbol(symbol)
-        try:
-            pair = ForexPair.objects.get(symbol=normalized_symbol)
-        except ForexPair.DoesNotExist:
+        pair = _get_pair_cached(normalized_symbol, _cache_bucket())
+        if pair is None:
             raise ValueError(f"Invalid forex pair: {symbol}")
 
         if not pair.is_active:
@@ -35,9 +67,8 @@ class PairService:
         Returns ForexPair instance or raises error.
         """
         normalized_symbol = PairService._normalize_symbol(symbol)
-        try:
-            pair = ForexPair.objects.get(symbol=normalized_symbol, is_active=True)
-        except ForexPair.DoesNotExist:
+        pair = _get_pair_cached(normalized_symbol, _cache_bucket())
+        if pair is None or not pair.is_active:
             raise ValueError(f"Forex pair not found or inactive: {symbol}")
 
         return pair
@@ -45,13 +76,38 @@ class PairService:
     @staticmethod
     def list_active_pairs() -> List[str]:
         """
-        Returns list of active forex pair symbols.
+        Returns list of active forex pair symbols, from the cached active
+        pairs list (see get_active_pairs).
+        """
+        return [pair["symbol"] for pair in PairService.get_active_pairs()]
+
+    @staticmethod
+    def get_active_pairs(cache_service: Optional[CacheService] = None) -> List[Dict]:
+        """
+        Returns active forex pairs as API-shaped dicts (id, symbol, base, quote),
+        ordered by symbol. Served from cache; on a miss the list is loaded
+        from the DB and cached.
+        """
+        cache_service = cache_service or CacheService()
+        pairs = cache_service.get_active_pairs()
+        if pairs is None:
+            pairs = PairService.load_active_pairs()
+            cache_service.set_active_pairs(pairs)
+        return pairs
+
+    @staticmethod
+    def load_active_pairs() -> List[Dict]:
+        """
+        Loads active forex pairs from the DB in the cached API shape.
         """
-        return list(
-            ForexPair.objects
-            .filter(is_active=True)
-            .values_list("symbol", flat=True)
-        )
+        return [
+            {"id": pair_id, "symbol": symbol, "base": base, "quote": quote}
+            for pair_id, symbol, base, quote in (
+                ForexPair.active_objects
+                .order_by("symbol")
+                .values_list("id", "symbol", "base_currency", "quote_currency")
+            )
+        ]
 
     @staticmethod
     def is_pair_active(symbol: str) -> bool:
@@ -59,7 +115,5 @@ class PairService:
         Checks if a forex pair exists and is active.
         """
         normalized_symbol = PairService._normalize_symbol(symbol)
-        return ForexPair.objects.filter(
-            symbol=normalized_symbol,
-            is_active=True
-        ).exists()
+        pair = _get_pair_cached(normalized_symbol, _cache_bucket())
+        return pair is not None and pair.is_active
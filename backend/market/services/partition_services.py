@@ -0,0 +1,162 @@
+import logging
+from datetime import date, timedelta
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class PriceHistoryPartitionService:
+    """
+    Maintenance of the monthly RANGE partitions of forex_price_history.
+    Partitions are named forex_price_history_pYYYY_MM and cover one calendar
+    month of `timestamp`. All methods are no-ops unless the table is a
+    partitioned Postgres table (see migration 0004).
+    """
+
+    TABLE = "forex_price_history"
+    DEFAULT_PARTITION = "forex_price_history_default"
+
+    @staticmethod
+    def _month_start(day: date) -> date:
+        return day.replace(day=1)
+
+    @staticmethod
+    def _next_month(month: date) -> date:
+        return (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+    @classmethod
+    def partition_name(cls, month: date) -> str:
+        return f"{cls.TABLE}_p{month.year:04d}_{month.month:02d}"
+
+    @classmethod
+    def is_partitioned(cls) -> bool:
+        if connection.vendor != "postgresql":
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_partitioned_table pt "
+                "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = %s",
+                [cls.TABLE],
+            )
+            return cursor.fetchone() is not None
+
+    @classmethod
+    def list_partitions(cls) -> List[str]:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent "
+                "WHERE p.relname = %s ORDER BY c.relname",
+                [cls.TABLE],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    @classmethod
+    def ensure_partitions(cls, months_ahead: int = 1) -> List[str]:
+        """
+        Create the partitions for the current month and the next
+        `months_ahead` months if they don't exist yet.
+        Returns the names of the partitions created.
+        """
+        if not cls.is_partitioned():
+            return []
+
+        existing = set(cls.list_partitions())
+        created = []
+        month = cls._month_start(timezone.now().date())
+        for _ in range(months_ahead + 1):
+            name = cls.partition_name(month)
+            if name not in existing:
+                if cls.DEFAULT_PARTITION in existing:
+                    cls._create_partition_from_default(name, month)
+                else:
+                    cls._create_partition(name, month)
+                created.append(name)
+                logger.info(f"Created price history partition {name}")
+            month = cls._next_month(month)
+        return created
+
+    @classmethod
+    def _create_partition(cls, name: str, month: date) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{cls.TABLE}" '
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [month.isoformat(), cls._next_month(month).isoformat()],
+            )
+
+    @classmethod
+    def _create_partition_from_default(cls, name: str, month: date) -> None:
+        """
+        Create the partition for `month` and move the month's rows out of the
+        default partition into it. Postgres refuses to create a partition
+        while the default partition holds rows of its range (e.g. written
+        while this task wasn't running), so the default is detached, drained
+        and re-attached in one transaction.
+        """
+        bounds = [month.isoformat(), cls._next_month(month).isoformat()]
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE "{cls.TABLE}" DETACH PARTITION "{cls.DEFAULT_PARTITION}"')
+            cls._create_partition(name, month)
+            cursor.execute(
+                f'WITH moved AS ('
+                f'DELETE FROM "{cls.DEFAULT_PARTITION}" '
+                f'WHERE "timestamp" >= %s AND "timestamp" < %s RETURNING *'
+                f') INSERT INTO "{name}" SELECT * FROM moved',
+                bounds,
+            )
+            if cursor.rowcount:
+                logger.info(f"Moved {cursor.rowcount} price history rows from the default partition to {name}")
+            cursor.execute(
+                f'ALTER TABLE "{cls.TABLE}" ATTACH PARTITION "{cls.DEFAULT_PARTITION}" DEFAULT'
+            )
+
+    @classmethod
+    def drop_expired_partitions(cls, retention_days: Optional[int] = None) -> List[str]:
+        """
+        Detach and drop monthly partitions whose whole range is older than
+        the retention window - instant DDL instead of a row-by-row DELETE.
+        Expired rows that landed in the default partition are deleted.
+        Returns the names of the partitions dropped.
+        """
+        if not cls.is_partitioned():
+            return []
+
+        if retention_days is None:
+            retention_days = settings.PRICE_HISTORY_RETENTION_DAYS
+        cutoff = timezone.now().date() - timedelta(days=retention_days)
+
+        partitions = cls.list_partitions()
+        prefix = f"{cls.TABLE}_p"
+        dropped = []
+        for name in partitions:
+            if not name.startswith(prefix):
+                continue  # default partition
+            try:
+                year, month = name[len(prefix):].split("_")
+                month_start = date(int(year), int(month), 1)
+            except ValueError:
+                continue
+            if cls._next_month(month_start) > cutoff:
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute(f'ALTER TABLE "{cls.TABLE}" DETACH PARTITION "{name}"')
+                cursor.execute(f'DROP TABLE "{name}"')
+            dropped.append(name)
+            logger.info(f"Dropped expired price history partition {name}")
+
+        if cls.DEFAULT_PARTITION not in partitions:
+            return dropped
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM "{cls.DEFAULT_PARTITION}" WHERE "timestamp" < %s',
+                [cutoff.isoformat()],
+            )
+            if cursor.rowcount:
+                logger.info(f"Pruned {cursor.rowcount} expired price history rows from the default partition")
+        return dropped
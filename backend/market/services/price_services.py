@@ -1,17 +1,38 @@
-from typing import Dict
+import logging
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
 from django.db import transaction
+from django.utils import timezone
 
-from market.models import ForexPriceSnapshot
+from market.models import ForexPair, ForexPriceSnapshot
 from market.services.pair_services import PairService
 from market.providers.base import MarketDataProvider
 from cache.services import CacheService
 
+logger = logging.getLogger(__name__)
+
 
 class PriceService:
     """
     Service for fetching latest forex prices.
     """
 
+    # Provider results are reused in-process for this long, and concurrent
+    # callers for the same symbol share one in-flight provider request
+    PROVIDER_TTL = 1.0
+    PROVIDER_WAIT_TIMEOUT = 15.0
+
+    # Snapshots older than this are refreshed from the provider (polling
+    # runs every 30s, so a healthy poller never lets one get this old)
+    SNAPSHOT_MAX_AGE = timedelta(minutes=2)
+
+    # Provider prices are rounded to the 8 decimal places the snapshot
+    # columns store, so cached/returned values match what the DB holds
+    PRICE_QUANTUM = Decimal("1e-8")
+
     def __init__(
         self,
         provider: MarketDataProvider,
@@ -19,41 +40,102 @@ class PriceService:
     ):
         self.provider = provider
         self.cache = cache_service
+        self._provider_results: Dict[str, Tuple[float, Optional[Dict], Optional[Exception]]] = {}
+        self._provider_inflight: Dict[str, threading.Event] = {}
+        self._provider_lock = threading.Lock()
+
+    def _fetch_from_provider(self, symbol: str) -> Dict:
+        """
+        provider.get_latest_price with a short in-process TTL cache and
+        request coalescing: the first caller for a symbol fetches, concurrent
+        callers wait for its result instead of issuing duplicate requests.
+        Failures are cached for the same TTL and re-raised to the waiters,
+        so a failing upstream sees one request per symbol, not one per caller.
+        """
+        while True:
+            with self._provider_lock:
+                entry = self._provider_results.get(symbol)
+                if entry is not None and time.monotonic() - entry[0] < self.PROVIDER_TTL:
+                    return self._provider_outcome(entry)
+                event = self._provider_inflight.get(symbol)
+                leader = event is None
+                if leader:
+                    event = self._provider_inflight[symbol] = threading.Event()
+
+            if leader:
+                break
+
+            # Wait for the in-flight request, then re-check: its result (or
+            # failure) is normally cached by now; if it is still running
+            # after the timeout, this caller simply waits again
+            event.wait(self.PROVIDER_WAIT_TIMEOUT)
+
+        try:
+            data = self.provider.get_latest_price(symbol)
+        except Exception as e:
+            with self._provider_lock:
+                self._provider_results[symbol] = (time.monotonic(), None, e)
+            raise
+        else:
+            with self._provider_lock:
+                self._provider_results[symbol] = (time.monotonic(), data, None)
+            return data
+        finally:
+            with self._provider_lock:
+                self._provider_inflight.pop(symbol, None)
+            event.set()
+
+    @staticmethod
+    def _provider_outcome(entry: Tuple[float, Optional[Dict], Optional[Exception]]) -> Dict:
+        """
+        Data of a cached provider result, or raise for its cached failure.
+        Each caller gets its own exception chained to the original, so
+        concurrent callers don't share (and grow) one traceback.
+        """
+        _, data, error = entry
+        if error is not None:
+            raise RuntimeError(f"Provider fetch failed: {error}") from error
+        return data
 
     def get_latest_price(self, symbol: str) -> Dict:
-        # 1. Validate pair
-        pair = PairService.get_pair(symbol)
+        symbol = PairService._normalize_symbol(symbol)
 
-        # 2. Cache lookup (Redis)
+        # 1. Cache lookup (Redis): prices are only cached for active pairs
+        # (for PRICE_TTL), so a hit skips the pair lookup
         cached = self.cache.get_price(symbol)
         if cached:
             return cached
 
-        # 3. DB fallback
+        # 2. Validate pair
+        pair = PairService.get_pair(symbol)
+
+        # 3. DB fallback, while the snapshot is fresh (the poller keeps it so)
         snapshot = (
             ForexPriceSnapshot.objects
             .filter(pair=pair)
             .first()
         )
 
-        if snapshot:
+        if snapshot and timezone.now() - snapshot.timestamp < self.SNAPSHOT_MAX_AGE:
             data = self._serialize_snapshot(snapshot)
             self.cache.set_price(symbol, data)
             return data
 
-        # 4. Provider fetch
-        provider_data = self.provider.get_latest_price(symbol)
+        # 4. Provider fetch: no snapshot yet, or a stale one because polling
+        # fell behind. Concurrent callers share one coalesced request; if it
+        # fails, a stale snapshot is still served rather than an error
+        try:
+            provider_data = self._fetch_from_provider(symbol)
+        except Exception:
+            if snapshot is None:
+                raise
+            logger.warning(f"Refreshing stale price for {symbol} failed", exc_info=True)
+            data = self._serialize_snapshot(snapshot)
+            self.cache.set_price(symbol, data)
+            return data
 
-        # 5. Normalize + persist
-        with transaction.atomic():
-            snapshot, _ = ForexPriceSnapshot.objects.update_or_create(
-                pair=pair,
-                defaults={
-                    "price": provider_data["price"],
-                    "bid": provider_data.get("bid", provider_data["price"]),  # Fallback to price if bid not available
-                    "ask": provider_data.get("ask", provider_data["price"]),  # Fallback to price if ask not available
-                }
-            )
+        # 5. Normalize + persist (one INSERT ... ON CONFLICT DO UPDATE)
+        snapshot, = ForexPriceSnapshot.bulk_upsert([self._snapshot_row(pair, provider_data)])
 
         # 6. Cache provider result
         data = self._serialize_snapshot(snapshot)
@@ -61,6 +143,74 @@ class PriceService:
 
         return data
 
+    def get_latest_prices(self, symbols: List[str]) -> Dict[str, Dict]:
+        """
+        Vectorized get_latest_price: one cache MGET, one DB query for the
+        misses, one provider batch call for what is still missing, then one
+        snapshot upsert and one pipelined cache write.
+        Returns symbol -> price data; unknown or inactive symbols are omitted.
+        """
+        # 1. Cache lookup (Redis), single round-trip
+        cached = self.cache.get_prices_bulk(symbols)
+        results = {symbol: data for symbol, data in cached.items() if data}
+        missing = [symbol for symbol in symbols if symbol not in results]
+        if not missing:
+            return results
+
+        # 2. Validate the misses
+        pairs = {
+            pair.symbol: pair
+            for pair in ForexPair.active_objects.filter(symbol__in=missing)
+        }
+        if not pairs:
+            return results
+
+        # 3. DB fallback
+        fresh = {}
+        for snapshot in ForexPriceSnapshot.objects.filter(pair__in=pairs.values()).select_related('pair'):
+            fresh[snapshot.pair.symbol] = self._serialize_snapshot(snapshot)
+
+        # 4. Provider fetch for pairs without a snapshot
+        still_missing = [symbol for symbol in pairs if symbol not in fresh]
+        if still_missing:
+            fetch_batch = getattr(self.provider, "get_latest_prices_batch", None)
+            if fetch_batch is not None:
+                provider_data = fetch_batch(still_missing)
+            else:
+                provider_data = {symbol: self._fetch_from_provider(symbol) for symbol in still_missing}
+
+            # 5. Normalize + persist in one upsert
+            rows = [
+                self._snapshot_row(pairs[symbol], data)
+                for symbol, data in provider_data.items()
+                if symbol in pairs
+            ]
+            if rows:
+                with transaction.atomic():
+                    snapshots = ForexPriceSnapshot.bulk_upsert(rows)
+                for snapshot in snapshots:
+                    fresh[snapshot.pair.symbol] = self._serialize_snapshot(snapshot)
+
+        # 6. Cache DB/provider results in one pipeline
+        self.cache.set_prices_bulk(fresh)
+        results.update(fresh)
+        return results
+
+    @classmethod
+    def _snapshot_row(cls, pair: ForexPair, data: Dict) -> Dict:
+        """
+        Snapshot upsert row for provider price data, rounded to PRICE_QUANTUM.
+        """
+        price = Decimal(data["price"])
+        bid = Decimal(data.get("bid", price))  # Fallback to price if bid not available
+        ask = Decimal(data.get("ask", price))  # Fallback to price if ask not available
+        return {
+            "pair": pair,
+            "price": price.quantize(cls.PRICE_QUANTUM),
+            "bid": bid.quantize(cls.PRICE_QUANTUM),
+            "ask": ask.quantize(cls.PRICE_QUANTUM),
+        }
+
     @staticmethod
     def _serialize_snapshot(snapshot: ForexPriceSnapshot) -> Dict:
         return {
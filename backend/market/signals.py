@@ -0,0 +1,19 @@
+"""
+Signal handlers for market models.
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from market.models import ForexPair
+from market.services.pair_services import PairService
+from cache.services import CacheService
+
+
+@receiver([post_save, post_delete], sender=ForexPair)
+def invalidate_active_pairs(sender, **kwargs):
+    """
+    Drop the cached active pairs list and this process' pair lookups
+    whenever a pair is saved or deleted.
+    """
+    CacheService().delete_active_pairs()
+    PairService.clear_local_cache()
@@ -1,19 +1,59 @@
 import logging
-from celery import shared_task
+from contextlib import suppress
+from celery import chord, shared_task
 from django.db import transaction
-from django.db.models import Min, Max, F
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db.models import DateTimeField, DecimalField, Func, Min, Max
 from django.utils import timezone
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone as dt_timezone
 from decimal import Decimal
 
 from market.models import ForexPriceSnapshot, ForexCandle, ForexPair, ForexPriceHistory
 from market.services.pair_services import PairService
 from market.services.price_services import PriceService
+from market.services.partition_services import PriceHistoryPartitionService
 from market.providers.forexrateapi import ForexRateAPIProvider
 from cache.services import CacheService
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on pairs refetched one by one after an incomplete batch
+MAX_REFETCH_PAIRS = 10
+
+# Candle length per aggregated interval
+INTERVAL_DELTAS = {
+    '5m': timedelta(minutes=5),
+    '15m': timedelta(minutes=15),
+    '1h': timedelta(hours=1),
+    '1d': timedelta(days=1),
+}
+
+# Postgres interval literals for the same buckets (see _DateBin)
+INTERVAL_BUCKETS = {
+    '5m': '5 minutes',
+    '15m': '15 minutes',
+    '1h': '1 hour',
+    '1d': '1 day',
+}
+
+
+class _DateBin(Func):
+    """
+    date_bin(): floor a timestamp to the start of its `stride` bucket,
+    with buckets aligned to the Unix epoch (so '1d' starts at 00:00 UTC).
+    """
+    template = "date_bin(INTERVAL '%(stride)s', %(expressions)s, TIMESTAMPTZ '1970-01-01 00:00:00+00')"
+    output_field = DateTimeField()
+
+
+class _FirstElement(Func):
+    """
+    First element of an array expression, e.g. of an ordered ArrayAgg.
+    """
+    template = "(%(expressions)s)[1]"
+    output_field = DecimalField(max_digits=20, decimal_places=8)
+
+
 
 @shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, retry_kwargs={'max_retries': 3})
 def poll_latest_prices(self):
@@ -22,84 +62,56 @@ def poll_latest_prices(self):
     Uses batch requests and rate inversion to minimize API calls.
     Continues processing other pairs even if some fail.
     """
-    # Get list of active pair symbols
-    pair_symbols = PairService.list_active_pairs()
+    # Active pairs once, indexed by symbol (no per-symbol lookups below)
+    pairs_by_symbol = _active_pairs_by_symbol()
+    pair_symbols = list(pairs_by_symbol)
     
     if not pair_symbols:
         return {"message": "No active pairs found", "updated": 0}
     
-    # Initialize provider and cache service
+    # Initialize provider
     provider = ForexRateAPIProvider()
-    cache_service = CacheService()
+    
+    # Unique base currencies (estimate of API calls made), computed once;
+    # _parse_symbol is lru_cached, so the batch path reuses these parses
+    unique_bases = set()
+    for symbol in pair_symbols:
+        with suppress(ValueError):
+            unique_bases.add(provider._parse_symbol(symbol)[0])
     
     # Fetch all prices in optimized batches (reduces API calls significantly)
     try:
         batch_results = provider.get_latest_prices_batch(pair_symbols)
-        logger.info(f"Batch fetch completed: {len(batch_results)}/{len(pair_symbols)} pairs fetched")
+        logger.info(
+            f"Batch fetch completed: {len(batch_results)}/{len(pair_symbols)} pairs fetched "
+            f"across {len(unique_bases)} base currencies"
+        )
     except Exception as e:
         logger.error(f"Batch fetch failed: {e}", exc_info=True)
         batch_results = {}
     
-    updated_count = 0
-    failed_count = 0
-    failed_pairs = []
+    updated, failed_pairs = _store_prices(batch_results, pairs_by_symbol)
+    updated_count = len(updated)
     
-    # Process results from batch fetch
-    for symbol in pair_symbols:
-        if symbol not in batch_results:
-            failed_count += 1
-            failed_pairs.append(symbol)
-            logger.warning(f"No price data returned for {symbol} from batch fetch")
-            continue
-        
-        try:
-            # Get ForexPair object (not just symbol string)
-            pair = PairService.get_pair(symbol)
-            data = batch_results[symbol]
-            
-            # Update or create snapshot in database
-            with transaction.atomic():
-                snapshot, created = ForexPriceSnapshot.objects.update_or_create(
-                    pair=pair,
-                    defaults={
-                        "price": data["price"],
-                        "bid": data.get("bid", data["price"]),  # Fallback to price if bid not available
-                        "ask": data.get("ask", data["price"]),  # Fallback to price if ask not available
-                    }
-                )
-                
-                # Also store in historical table for candle aggregation
-                ForexPriceHistory.objects.create(
-                    pair=pair,
-                    price=data["price"],
-                    bid=data.get("bid", data["price"]),
-                    ask=data.get("ask", data["price"]),
-                    timestamp=timezone.now()
-                )
-            
-            # Update cache using CacheService
-            cache_data = PriceService._serialize_snapshot(snapshot)
-            cache_service.set_price(symbol, cache_data)
-            
-            updated_count += 1
-            logger.info(f"Successfully updated price for {symbol}")
-            
-        except Exception as e:
-            # Log error but continue with other pairs
-            failed_count += 1
-            failed_pairs.append(symbol)
-            logger.warning(f"Failed to update price for {symbol}: {e}", exc_info=True)
-            # Don't retry here - let the task complete for other pairs
-            continue
-    
-    # Calculate unique base currencies (estimate of API calls made)
-    unique_bases = set()
-    for symbol in pair_symbols:
-        try:
-            base, _ = provider._parse_symbol(symbol)
-            unique_bases.add(base)
-        except:
-            pass
+    # Pairs a working batch couldn't price (e.g. its per-base fallback
+    # requests failed) are fetched individually in parallel across workers;
+    # the chord callback stores them once all fetches finished. Skipped when
+    # the batch itself failed or came back empty (outage, quota): per-pair
+    # requests would only multiply the load on a failing upstream.
+    missing = [symbol for symbol in pair_symbols if symbol not in batch_results]
+    refetching = []
+    if missing:
+        logger.warning(f"No price data returned for {len(missing)} pairs from batch fetch: {missing}")
+        if batch_results and CacheService().claim_price_refetch():
+            refetching = missing[:MAX_REFETCH_PAIRS]
+            try:
+                chord(fetch_latest_price.s(symbol) for symbol in refetching)(store_latest_prices.s())
+            except Exception as e:
+                CacheService().release_price_refetch()
+                refetching = []
+                logger.error(f"Failed to dispatch per-pair price fetches: {e}", exc_info=True)
+        failed_pairs.extend(symbol for symbol in missing if symbol not in refetching)
+    failed_count = len(failed_pairs)
     
     result = {
         "message": f"Updated {updated_count}/{len(pair_symbols)} pairs",
@@ -111,10 +123,139 @@ def poll_latest_prices(self):
     
     if failed_pairs:
         result["failed_pairs"] = failed_pairs
+    if refetching:
+        result["refetching_pairs"] = refetching
     
     return result
 
 
+@shared_task
+def fetch_latest_price(symbol: str) -> dict:
+    """
+    Fetch one pair from the provider: the per-symbol leg of the poller's
+    fallback chord. Returns {symbol: price data}, or {} on failure.
+    """
+    try:
+        return {symbol: ForexRateAPIProvider().get_latest_price(symbol)}
+    except Exception as e:
+        logger.warning(f"Failed to fetch price for {symbol}: {e}", exc_info=True)
+        return {}
+
+
+@shared_task
+def store_latest_prices(results: list) -> dict:
+    """
+    Chord callback: store the prices collected by fetch_latest_price.
+    """
+    prices = {}
+    for result in results:
+        prices.update(result)
+    
+    # Stamped with each price's fetch time, never written over a newer
+    # snapshot: the next poll may already have stored a later price
+    try:
+        updated, failed_pairs = _store_prices(
+            prices, _active_pairs_by_symbol(), use_provider_time=True
+        )
+    finally:
+        CacheService().release_price_refetch()
+    return {
+        "message": f"Updated {len(updated)}/{len(results)} refetched pairs",
+        "updated": len(updated),
+        "failed_pairs": failed_pairs,
+    }
+
+
+def _active_pairs_by_symbol() -> dict:
+    """
+    symbol -> ForexPair for the active pairs in the cached active pairs list
+    (PairService.get_active_pairs). The ids are resolved in one query rather
+    than taken from the cache: a stale cached list may still name pairs that
+    were since deleted or deactivated, and their ids would fail the snapshot
+    foreign key for the whole poll. Only id and symbol are loaded, which is
+    all storing prices needs.
+    """
+    symbols = [pair["symbol"] for pair in PairService.get_active_pairs()]
+    return {
+        pair.symbol: pair
+        for pair in ForexPair.active_objects.filter(symbol__in=symbols).only("id", "symbol")
+    }
+
+
+def _store_prices(prices: dict, pairs_by_symbol: dict, use_provider_time: bool = False) -> tuple:
+    """
+    Store provider price data (symbol -> data) for the given active pairs:
+    upsert snapshots and append history rows in one transaction, then
+    cache them. Returns (updated symbols, failed symbols).
+    use_provider_time: stamp rows with the provider's epoch "timestamp"
+    instead of now, and skip pairs whose stored snapshot is not older.
+    """
+    now = timezone.now()
+    rows = []
+    failed_pairs = []
+    
+    for symbol, data in prices.items():
+        try:
+            rows.append({
+                "pair": pairs_by_symbol[symbol],
+                "price": data["price"],
+                "bid": data.get("bid", data["price"]),  # Fallback to price if bid not available
+                "ask": data.get("ask", data["price"]),  # Fallback to price if ask not available
+                "timestamp": (
+                    datetime.fromtimestamp(data["timestamp"], tz=dt_timezone.utc)
+                    if use_provider_time else now
+                ),
+            })
+        except Exception as e:
+            # Log error but continue with other pairs
+            failed_pairs.append(symbol)
+            logger.warning(f"Failed to update price for {symbol}: {e}", exc_info=True)
+    
+    if not rows:
+        return [], failed_pairs
+    
+    try:
+        # Upsert all snapshots and append all history rows in one transaction
+        with transaction.atomic():
+            if use_provider_time:
+                # Lock the stored snapshots so a concurrent poll can't slip
+                # a newer price in between this check and the upsert
+                stored = dict(
+                    ForexPriceSnapshot.objects.select_for_update()
+                    .filter(pair_id__in=[row["pair"].id for row in rows])
+                    .values_list("pair_id", "timestamp")
+                )
+                rows = [
+                    row for row in rows
+                    if row["pair"].id not in stored or stored[row["pair"].id] < row["timestamp"]
+                ]
+            
+            snapshots = ForexPriceSnapshot.bulk_upsert(rows)
+            
+            # Also store in historical table for candle aggregation
+            ForexPriceHistory.objects.bulk_create(
+                [ForexPriceHistory(**row) for row in rows],
+                batch_size=500,
+            )
+            
+            # Update cache using CacheService, all pairs in one pipelined
+            # call, only once COMMIT returned: Redis latency never extends
+            # the transaction and readers never see uncommitted prices
+            pending_cache = {
+                snapshot.pair.symbol: PriceService._serialize_snapshot(snapshot)
+                for snapshot in snapshots
+            }
+            transaction.on_commit(lambda: CacheService().set_prices_bulk(pending_cache))
+    except Exception as e:
+        failed_pairs.extend(row["pair"].symbol for row in rows)
+        logger.warning(f"Failed to store prices for {len(rows)} pairs: {e}", exc_info=True)
+        return [], failed_pairs
+    
+    updated = list(pending_cache)
+    logger.info(f"Successfully updated prices for {len(updated)} pairs")
+    return updated, failed_pairs
+
+
 @shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, retry_kwargs={'max_retries': 3})
 def aggregate_candles(self, interval: str):
     """
@@ -138,145 +279,99 @@ def aggregate_candles(self, interval: str):
         logger.error(error_msg)
         return {"error": error_msg, "candles_created": 0}
     
-    # Get all active pairs
-    pairs = ForexPair.objects.filter(is_active=True)
+    # Get all active pairs as (id, symbol) tuples - no model instances needed
+    pairs = list(ForexPair.active_objects.values_list("id", "symbol"))
     
-    if not pairs.exists():
+    if not pairs:
         return {"message": "No active pairs found", "candles_created": 0, "interval": interval}
     
-    logger.info(f"Aggregating {interval} candles for {pairs.count()} pairs from price history")
+    logger.info(f"Aggregating {interval} candles for {len(pairs)} pairs from price history")
     
     candles_created = 0
     candles_updated = 0
     failed_count = 0
     failed_pairs = []
     
-    # Calculate time delta for the interval
-    interval_deltas = {
-        '5m': timedelta(minutes=5),
-        '15m': timedelta(minutes=15),
-        '1h': timedelta(hours=1),
-        '1d': timedelta(days=1),
-    }
-    interval_delta = interval_deltas[interval]
-    
     # Calculate how far back to look for historical data
     # For each interval, we need at least one full period of data
-    lookback_time = timezone.now() - interval_delta
+    lookback_time = timezone.now() - INTERVAL_DELTAS[interval]
+    
+    # One GROUP BY over (pair, bucket) computes every candle in the database:
+    # high/low are plain aggregates, open/close the first/last price by time
+    pair_symbols = dict(pairs)
+    candle_rows = (
+        ForexPriceHistory.objects
+        .filter(pair_id__in=pair_symbols, timestamp__gte=lookback_time)
+        .annotate(bucket=_DateBin("timestamp", stride=INTERVAL_BUCKETS[interval]))
+        .values("pair_id", "bucket")
+        .annotate(
+            open=_FirstElement(ArrayAgg("price", order_by="timestamp")),
+            high=Max("price"),
+            low=Min("price"),
+            close=_FirstElement(ArrayAgg("price", order_by="-timestamp")),
+        )
+        .order_by("pair_id", "bucket")
+        .iterator(chunk_size=2000)
+    )
+    
+    candles = [
+        ForexCandle(
+            pair_id=row["pair_id"],
+            timeframe=interval,
+            timestamp=row["bucket"],
+            open=row["open"],
+            high=row["high"],
+            low=row["low"],
+            close=row["close"],
+            volume=Decimal('0'),  # Volume not available from snapshots
+        )
+        for row in candle_rows
+    ]
     
-    for pair in pairs:
+    if candles:
         try:
-            # Get historical price snapshots for this pair within the lookback period
-            # We need enough data to create at least one complete candle
-            price_history = ForexPriceHistory.objects.filter(
-                pair=pair,
-                timestamp__gte=lookback_time
-            ).order_by('timestamp')
-            
-            if not price_history.exists():
-                logger.debug(f"No price history found for {pair.symbol} in the last {interval}")
-                continue
-            
-            # Group snapshots by candle period
-            candles_data = {}
-            
-            for snapshot in price_history:
-                # Round down timestamp to the start of the candle period
-                snapshot_time = snapshot.timestamp
-                
-                if interval == '5m':
-                    candle_start = snapshot_time.replace(
-                        minute=(snapshot_time.minute // 5) * 5,
-                        second=0,
-                        microsecond=0
-                    )
-                elif interval == '15m':
-                    candle_start = snapshot_time.replace(
-                        minute=(snapshot_time.minute // 15) * 15,
-                        second=0,
-                        microsecond=0
-                    )
-                elif interval == '1h':
-                    candle_start = snapshot_time.replace(
-                        minute=0,
-                        second=0,
-                        microsecond=0
-                    )
-                elif interval == '1d':
-                    candle_start = snapshot_time.replace(
-                        hour=0,
-                        minute=0,
-                        second=0,
-                        microsecond=0
-                    )
-                
-                # Initialize candle data if not exists
-                if candle_start not in candles_data:
-                    candles_data[candle_start] = {
-                        'open': snapshot.price,
-                        'high': snapshot.price,
-                        'low': snapshot.price,
-                        'close': snapshot.price,
-                        'count': 0,
-                    }
-                
-                # Update OHLC values
-                candle = candles_data[candle_start]
-                if snapshot.price > candle['high']:
-                    candle['high'] = snapshot.price
-                if snapshot.price < candle['low']:
-                    candle['low'] = snapshot.price
-                candle['close'] = snapshot.price  # Close is always the last price in the period
-                candle['count'] += 1
-            
-            # Create or update candles in database
-            for candle_start, candle_data in candles_data.items():
-                candle, created = ForexCandle.objects.get_or_create(
-                    pair=pair,
-                    timeframe=interval,
-                    timestamp=candle_start,
-                    defaults={
-                        "open": candle_data['open'],
-                        "high": candle_data['high'],
-                        "low": candle_data['low'],
-                        "close": candle_data['close'],
-                        "volume": Decimal('0'),  # Volume not available from snapshots
-                    }
-                )
-                
-                if created:
-                    candles_created += 1
-                else:
-                    # Update existing candle with aggregated data
-                    ForexCandle.objects.filter(
-                        pair=pair,
+            with transaction.atomic():
+                # Stored OHLC of the candles in range: unchanged candles
+                # (no new ticks in their bucket) are not rewritten
+                existing = {
+                    (pair_id, timestamp): ohlc
+                    for pair_id, timestamp, *ohlc in ForexCandle.objects.filter(
+                        pair_id__in=pair_symbols,
                         timeframe=interval,
-                        timestamp=candle_start
-                    ).update(
-                        open=candle_data['open'],
-                        high=candle_data['high'],
-                        low=candle_data['low'],
-                        close=candle_data['close'],
-                    )
-                    candles_updated += 1
-            
-            logger.debug(
-                f"Processed {len(candles_data)} candles for {pair.symbol} ({interval})"
-            )
-            
+                        timestamp__gte=min(candle.timestamp for candle in candles),
+                    ).values_list("pair_id", "timestamp", "open", "high", "low", "close")
+                }
+                changed = [
+                    candle for candle in candles
+                    if existing.get((candle.pair_id, candle.timestamp))
+                    != [candle.open, candle.high, candle.low, candle.close]
+                ]
+                # Create or update the changed candles in one upsert statement
+                ForexCandle.objects.bulk_create(
+                    changed,
+                    update_conflicts=True,
+                    unique_fields=['pair', 'timeframe', 'timestamp'],
+                    update_fields=['open', 'high', 'low', 'close'],
+                    batch_size=1000,
+                )
         except Exception as e:
-            failed_count += 1
-            failed_pairs.append(pair.symbol)
+            failed_symbols = {pair_symbols[candle.pair_id] for candle in candles}
+            failed_count = len(failed_symbols)
+            failed_pairs = sorted(failed_symbols)
             logger.warning(
-                f"Failed to aggregate candles for {pair.symbol} ({interval}): {e}",
+                f"Failed to store {len(candles)} {interval} candles: {e}",
                 exc_info=True
             )
-            continue
+        else:
+            candles_updated = sum(
+                (candle.pair_id, candle.timestamp) in existing for candle in changed
+            )
+            candles_created = len(changed) - candles_updated
     
     result = {
         "message": f"Aggregated {interval} candles: {candles_created} created, {candles_updated} updated",
         "interval": interval,
-        "pairs_processed": pairs.count(),
+        "pairs_processed": len(pairs),
         "candles_created": candles_created,
         "candles_updated": candles_updated,
         "failed": failed_count,
@@ -292,3 +387,28 @@ def aggregate_candles(self, interval: str):
     
     return result
 
+
+@shared_task
+def refresh_active_pairs():
+    """
+    Reload the active pairs list from the DB into the cache.
+    Enqueued by CacheService when it serves the stale copy of the list.
+    """
+    pairs = PairService.load_active_pairs()
+    CacheService().set_active_pairs(pairs)
+    return {"message": f"Cached {len(pairs)} active pairs", "pairs": len(pairs)}
+
+
+@shared_task
+def maintain_price_history_partitions():
+    """
+    Pre-create next month's price history partition and drop the partitions
+    that fell out of the retention window (settings.PRICE_HISTORY_RETENTION_DAYS).
+    """
+    created = PriceHistoryPartitionService.ensure_partitions()
+    dropped = PriceHistoryPartitionService.drop_expired_partitions()
+    return {
+        "message": f"Partitions: {len(created)} created, {len(dropped)} dropped",
+        "created": created,
+        "dropped": dropped,
+    }
@@ -1,3 +1,390 @@
-from django.test import TestCase
+import json
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from cache.services import CacheService
+from market import tasks
+from market.models import ForexCandle, ForexPair, ForexPriceHistory, ForexPriceSnapshot
+from market.providers.forexrateapi import ForexRateAPIProvider
+from market.services.partition_services import PriceHistoryPartitionService
+from market.services.price_services import PriceService
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def _create_pair(symbol: str) -> ForexPair:
+    return ForexPair.objects.create(symbol=symbol, base_currency=symbol[:3], quote_currency=symbol[3:])
+
+
+class _Response:
+    """Minimal requests.Response stand-in for ForexRateAPI payloads"""
+
+    status_code = 200
+    ok = True
+
+    def __init__(self, payload: dict):
+        self.content = json.dumps(payload).encode()
+        self.text = self.content.decode()
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AggregateCandlesTests(TestCase):
+    """aggregate_candles: one date_bin + ArrayAgg GROUP BY, unchanged candles skipped"""
+
+    NOW = datetime(2026, 3, 10, 12, 30, tzinfo=dt_timezone.utc)
+
+    def setUp(self):
+        cache.clear()
+        self.pair = _create_pair("EURUSD")
+        # Inserted out of time order: open/close must follow the timestamps
+        self._add_history([
+            (datetime(2026, 3, 10, 12, 10, tzinfo=dt_timezone.utc), "1.3"),
+            (datetime(2026, 3, 10, 12, 5, tzinfo=dt_timezone.utc), "1.1"),
+            (datetime(2026, 3, 10, 12, 20, tzinfo=dt_timezone.utc), "1.2"),
+            (datetime(2026, 3, 10, 12, 15, tzinfo=dt_timezone.utc), "1.0"),
+            (datetime(2026, 3, 10, 11, 45, tzinfo=dt_timezone.utc), "1.05"),
+            # Outside the 1h lookback
+            (datetime(2026, 3, 10, 11, 0, tzinfo=dt_timezone.utc), "9.9"),
+        ])
+
+    def _add_history(self, ticks):
+        ForexPriceHistory.objects.bulk_create(
+            ForexPriceHistory(pair=self.pair, price=Decimal(price), bid=Decimal(price), ask=Decimal(price), timestamp=ts)
+            for ts, price in ticks
+        )
+
+    def _aggregate(self):
+        with mock.patch.object(tasks.timezone, "now", return_value=self.NOW):
+            return tasks.aggregate_candles("1h")
+
+    def _ohlc(self, hour):
+        candle = ForexCandle.objects.get(
+            pair=self.pair, timeframe="1h", timestamp=datetime(2026, 3, 10, hour, tzinfo=dt_timezone.utc)
+        )
+        return [candle.open, candle.high, candle.low, candle.close]
+
+    def test_builds_ohlc_per_bucket(self):
+        result = self._aggregate()
+
+        self.assertEqual(result["candles_created"], 2)
+        self.assertEqual(result["candles_updated"], 0)
+        self.assertEqual(self._ohlc(12), [Decimal("1.1"), Decimal("1.3"), Decimal("1.0"), Decimal("1.2")])
+        self.assertEqual(self._ohlc(11), [Decimal("1.05")] * 4)
+
+    def test_unchanged_candles_are_not_rewritten(self):
+        self._aggregate()
+        result = self._aggregate()
+
+        self.assertEqual(result["candles_created"], 0)
+        self.assertEqual(result["candles_updated"], 0)
+
+    def test_new_ticks_update_their_candle(self):
+        self._aggregate()
+        self._add_history([(datetime(2026, 3, 10, 12, 25, tzinfo=dt_timezone.utc), "1.4")])
+        result = self._aggregate()
+
+        self.assertEqual(result["candles_created"], 0)
+        self.assertEqual(result["candles_updated"], 1)
+        self.assertEqual(self._ohlc(12), [Decimal("1.1"), Decimal("1.4"), Decimal("1.0"), Decimal("1.4")])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PriceHistoryPartitionTests(TestCase):
+    """Partition maintenance against the partitioned table of migration 0004"""
+
+    service = PriceHistoryPartitionService
+
+    def setUp(self):
+        if not self.service.is_partitioned():
+            self.skipTest("forex_price_history is only partitioned on PostgreSQL")
+        self.pair = _create_pair("EURUSD")
+
+    def _add_row(self, ts: datetime) -> int:
+        return ForexPriceHistory.objects.create(
+            pair=self.pair, price=Decimal("1.1"), bid=Decimal("1.1"), ask=Decimal("1.1"), timestamp=ts
+        ).id
+
+    def _partition_of(self, row_id: int) -> str:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT tableoid::regclass::text FROM "forex_price_history" WHERE "id" = %s', [row_id])
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    def test_ensure_partitions_moves_rows_out_of_default(self):
+        month = self.service._month_start(timezone.now().date())
+        for _ in range(6):
+            month = self.service._next_month(month)
+        row_id = self._add_row(datetime(month.year, month.month, 15, tzinfo=dt_timezone.utc))
+        self.assertEqual(self._partition_of(row_id), self.service.DEFAULT_PARTITION)
+
+        created = self.service.ensure_partitions(months_ahead=6)
+
+        self.assertIn(self.service.partition_name(month), created)
+        self.assertEqual(self._partition_of(row_id), self.service.partition_name(month))
+        self.assertIn(self.service.DEFAULT_PARTITION, self.service.list_partitions())
+
+    def test_ensure_partitions_is_idempotent(self):
+        self.service.ensure_partitions(months_ahead=2)
+        self.assertEqual(self.service.ensure_partitions(months_ahead=2), [])
+
+    def test_drop_expired_partitions(self):
+        old_month = date(2020, 1, 1)
+        name = self.service.partition_name(old_month)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TABLE "{name}" PARTITION OF "forex_price_history" FOR VALUES FROM (%s) TO (%s)',
+                [old_month.isoformat(), self.service._next_month(old_month).isoformat()],
+            )
+        self._add_row(datetime(2020, 1, 15, tzinfo=dt_timezone.utc))
+        expired_id = self._add_row(datetime(2019, 6, 1, tzinfo=dt_timezone.utc))
+        recent_id = self._add_row(timezone.now())
+        self.assertEqual(self._partition_of(expired_id), self.service.DEFAULT_PARTITION)
+        with connection.cursor() as cursor:
+            # The maintenance task runs after these rows were committed; within
+            # the test transaction their deferred FK checks would block DROP
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+        dropped = self.service.drop_expired_partitions(retention_days=90)
+
+        self.assertEqual(dropped, [name])
+        self.assertNotIn(name, self.service.list_partitions())
+        self.assertIsNone(self._partition_of(expired_id))
+        self.assertIsNotNone(self._partition_of(recent_id))
+
+
+@mock.patch.dict(os.environ, {"FOREX_RATE_API_KEY": "test"})
+class ForexRateAPIBatchTests(SimpleTestCase):
+    """get_latest_prices_batch: USD-pivot cross rates, per-base fallback and inverses"""
+
+    def _batch(self, symbols, responses):
+        requests = []
+
+        def fake_get(url, params=None, timeout=None):
+            requests.append(params["base"])
+            return _Response(responses[params["base"]])
+
+        with mock.patch.object(ForexRateAPIProvider._session, "get", side_effect=fake_get):
+            return ForexRateAPIProvider().get_latest_prices_batch(symbols), requests
+
+    def test_usd_pivot_cross_and_identity_rates(self):
+        results, requests = self._batch(
+            ["EURGBP", "EURUSD", "USDJPY", "EUREUR"],
+            {"USD": {"success": True, "rates": {"EUR": 0.9, "GBP": 0.8, "JPY": 150}}},
+        )
+
+        self.assertEqual(requests, ["USD"])
+        self.assertEqual(results["EURGBP"]["price"], Decimal("0.88888889"))
+        self.assertEqual(results["EURUSD"]["price"], Decimal("1.11111111"))
+        self.assertEqual(results["USDJPY"]["price"], Decimal("150"))
+        self.assertEqual(results["EUREUR"]["price"], Decimal("1"))
+        for data in results.values():
+            self.assertEqual(data["price"].as_tuple().exponent, -8)
+            self.assertEqual(data["bid"], data["price"])
+
+    def test_inverse_of_fetched_rate_when_base_request_fails(self):
+        error = {"success": False, "error": {"info": "base currency not allowed"}}
+        results, requests = self._batch(
+            ["EURUSD", "USDEUR"],
+            # The USD pivot request fails, so both bases are fetched
+            # separately; USD again fails and USDEUR is EURUSD inverted
+            {"USD": error, "EUR": {"success": True, "rates": {"USD": 1.08}}},
+        )
+
+        self.assertEqual(sorted(requests), ["EUR", "USD", "USD"])
+        self.assertEqual(results["EURUSD"]["price"], Decimal("1.08000000"))
+        self.assertEqual(results["USDEUR"]["price"], Decimal("0.92592593"))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ProviderCoalescingTests(SimpleTestCase):
+    """PriceService._fetch_from_provider: one provider request per symbol at a time"""
+
+    def setUp(self):
+        self.provider = mock.Mock()
+        self.service = PriceService(self.provider, CacheService())
+
+    def _fetch_concurrently(self, symbol, callers=8):
+        results, errors = [], []
+
+        def fetch():
+            try:
+                results.append(self.service._fetch_from_provider(symbol))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=fetch) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, errors
+
+    def _slow(self, outcome):
+        def get_latest_price(symbol):
+            time.sleep(0.2)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+        return get_latest_price
+
+    def test_concurrent_callers_share_one_request(self):
+        self.provider.get_latest_price.side_effect = self._slow({"price": Decimal("1.1")})
+
+        results, errors = self._fetch_concurrently("EURUSD")
+
+        self.assertEqual(self.provider.get_latest_price.call_count, 1)
+        self.assertEqual(errors, [])
+        self.assertEqual(results, [{"price": Decimal("1.1")}] * 8)
+
+    def test_failure_is_shared_but_each_caller_gets_its_own_exception(self):
+        failure = RuntimeError("upstream down")
+        self.provider.get_latest_price.side_effect = self._slow(failure)
+
+        results, errors = self._fetch_concurrently("EURUSD")
+
+        self.assertEqual(self.provider.get_latest_price.call_count, 1)
+        self.assertEqual(results, [])
+        self.assertEqual(len(errors), 8)
+        waiters = [e for e in errors if e is not failure]
+        self.assertEqual(len(waiters), 7)
+        self.assertEqual(len({id(e) for e in waiters}), 7)
+        for error in waiters:
+            self.assertIs(error.__cause__, failure)
+
+    def test_result_expires_after_ttl(self):
+        self.provider.get_latest_price.return_value = {"price": Decimal("1.1")}
+        self.service._fetch_from_provider("EURUSD")
+        self.service._fetch_from_provider("EURUSD")
+        self.assertEqual(self.provider.get_latest_price.call_count, 1)
+
+        with mock.patch.object(PriceService, "PROVIDER_TTL", 0):
+            self.service._fetch_from_provider("EURUSD")
+        self.assertEqual(self.provider.get_latest_price.call_count, 2)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class LatestPriceTests(TestCase):
+    """PriceService.get_latest_price: fresh snapshots served, stale ones refreshed"""
+
+    def setUp(self):
+        cache.clear()
+        self.pair = _create_pair("EURUSD")
+        self.provider = mock.Mock()
+        self.service = PriceService(self.provider, CacheService())
+
+    def _snapshot(self, age: timedelta):
+        ForexPriceSnapshot.objects.create(
+            pair=self.pair, price=Decimal("1.1"), bid=Decimal("1.1"), ask=Decimal("1.1"),
+            timestamp=timezone.now() - age,
+        )
+
+    def test_fresh_snapshot_is_served_without_provider(self):
+        self._snapshot(timedelta(seconds=10))
+
+        data = self.service.get_latest_price("EURUSD")
+
+        self.assertEqual(data["price"], "1.10000000")
+        self.provider.get_latest_price.assert_not_called()
+
+    def test_stale_snapshot_is_refreshed_and_quantized(self):
+        self._snapshot(PriceService.SNAPSHOT_MAX_AGE + timedelta(minutes=1))
+        self.provider.get_latest_price.return_value = {"price": Decimal("1.123456789")}
+
+        data = self.service.get_latest_price("EURUSD")
+
+        self.assertEqual(data["price"], "1.12345679")
+        self.assertEqual(ForexPriceSnapshot.objects.get(pair=self.pair).price, Decimal("1.12345679"))
+
+    def test_stale_snapshot_is_served_when_refresh_fails(self):
+        self._snapshot(PriceService.SNAPSHOT_MAX_AGE + timedelta(minutes=1))
+        self.provider.get_latest_price.side_effect = RuntimeError("upstream down")
+
+        data = self.service.get_latest_price("EURUSD")
+
+        self.assertEqual(data["price"], "1.10000000")
+
+    def test_bulk_provider_prices_are_quantized(self):
+        self.provider.get_latest_prices_batch.return_value = {"EURUSD": {"price": Decimal("0.925925925926")}}
+
+        results = self.service.get_latest_prices(["EURUSD"])
+
+        self.assertEqual(results["EURUSD"]["price"], "0.92592593")
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+@mock.patch.dict(os.environ, {"FOREX_RATE_API_KEY": "test"})
+class PollLatestPricesTests(TestCase):
+    """poll_latest_prices batch store, per-pair refetch chord and its callback"""
+
+    def setUp(self):
+        cache.clear()
+        CacheService._pairs_local = None
+        self.pairs = {symbol: _create_pair(symbol) for symbol in ("EURUSD", "GBPUSD", "USDJPY")}
+
+    def _quote(self, price: str, ts: datetime) -> dict:
+        price = Decimal(price)
+        return {"price": price, "bid": price, "ask": price, "timestamp": int(ts.timestamp())}
+
+    def _poll(self, batch_results):
+        with mock.patch.object(ForexRateAPIProvider, "get_latest_prices_batch", return_value=batch_results), \
+                mock.patch.object(tasks, "chord") as chord:
+            return tasks.poll_latest_prices(), chord
+
+    def test_missing_pairs_are_refetched_through_a_chord(self):
+        now = timezone.now()
+        result, chord = self._poll({"EURUSD": self._quote("1.1", now), "GBPUSD": self._quote("1.3", now)})
+
+        self.assertEqual(result["updated"], 2)
+        self.assertEqual(result["api_calls_made"], 3)
+        self.assertEqual(result["refetching_pairs"], ["USDJPY"])
+        self.assertEqual([sig.args for sig in chord.call_args.args[0]], [("USDJPY",)])
+        self.assertEqual(ForexPriceSnapshot.objects.count(), 2)
+        self.assertEqual(ForexPriceHistory.objects.count(), 2)
+
+    def test_no_refetch_when_batch_is_empty(self):
+        result, chord = self._poll({})
+
+        chord.assert_not_called()
+        self.assertEqual(result["failed"], 3)
+
+    def test_no_second_refetch_while_one_is_running(self):
+        now = timezone.now()
+        self._poll({"EURUSD": self._quote("1.1", now)})
+        result, chord = self._poll({"EURUSD": self._quote("1.1", now)})
+
+        chord.assert_not_called()
+        self.assertEqual(sorted(result["failed_pairs"]), ["GBPUSD", "USDJPY"])
+
+    def test_refetch_callback_skips_results_older_than_snapshot(self):
+        now = timezone.now()
+        ForexPriceSnapshot.bulk_upsert(
+            [{"pair": self.pairs["USDJPY"], "price": Decimal("150"), "bid": Decimal("150"), "ask": Decimal("150")}],
+            timestamp=now,
+        )
+
+        tasks.store_latest_prices([{"USDJPY": self._quote("149", now - timedelta(minutes=1))}])
+        self.assertEqual(ForexPriceSnapshot.objects.get(pair=self.pairs["USDJPY"]).price, Decimal("150"))
+
+        tasks.store_latest_prices([{"USDJPY": self._quote("151", now + timedelta(seconds=1))}, {}])
+        self.assertEqual(ForexPriceSnapshot.objects.get(pair=self.pairs["USDJPY"]).price, Decimal("151"))
+
+    def test_refetch_callback_releases_the_lock(self):
+        self.assertTrue(CacheService().claim_price_refetch())
+        tasks.store_latest_prices([{}])
+        self.assertTrue(CacheService().claim_price_refetch())
+
+    def test_cached_pairs_missing_from_db_are_skipped(self):
+        pairs = [{"id": pair.id, "symbol": symbol} for symbol, pair in self.pairs.items()]
+        self.pairs["GBPUSD"].delete()
+        CacheService().set_active_pairs(pairs)
+
+        self.assertEqual(sorted(tasks._active_pairs_by_symbol()), ["EURUSD", "USDJPY"])